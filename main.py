@@ -1,52 +1,91 @@
-from simulation.ui import UI
-from simulation.simulation import Simulation
-from simulation.real_time_simulation import RealTimeSimulation
-from utils import plotting
+import os
+import json
 import argparse
 
-# Run with python main.py n for n in {1, 2, 3} to execute the desired option
+# Run with python main.py n for n in {1, 2, 3} to execute the desired option.
+# The simulation, GUI and plotting stacks are imported inside the options, so each option only
+# loads what it uses; --headless never opens a window (figures are written next to --output).
+
+SCENARIOS = ["optimistic", "moderate", "pessimistic"]
+
+
+def _figure_path(output: str, suffix: str) -> str:
+    return f"{os.path.splitext(output)[0]}_{suffix}.png"
+
 
 # Option 1: Run the UI
-def run_option_1():
+def run_option_1(args):
+    if args.headless:
+        raise SystemExit("The UI (option 1) needs a display and cannot run headless")
+    from simulation.ui import UI
     ui = UI()
 
 # Option 2: Run the standard simulation
-def run_option_2():
-    sim = Simulation(num_trips=10000, use_real_data=False)
+def run_option_2(args):
+    from simulation.simulation import Simulation
+    from utils import plotting
+    sim = Simulation(num_trips=args.trips, seed=args.seed, use_real_data=False)
     sim.set_time_of_day("rush_hour")
-    results = sim.run()
+    results = sim.run(vectorized=args.vectorized, workers=args.workers)
     print("\n--- CO2 savings for different modal shift scenarios ---")
     for shift in [0.516, 0.31, 0.155]:
         sim.summarize_results(results, car_shift=shift)
+    output = args.output or "simulation_results.csv"
     summary = plotting.summarize_for_plot(results)
-    plotting.plot_summary(summary)
-    plotting.plot_distributions_per_vehicle(results)
+    plotting.plot_summary(summary, filename=_figure_path(output, "summary") if args.headless else None)
+    plotting.plot_distributions_per_vehicle(
+        results, filename=_figure_path(output, "distributions") if args.headless else None)
     # Write results to CSV
-    sim.write_results_to_csv(results)
+    sim.write_results_to_csv(results, filename=output)
 
 #  Option 3: Run the real-time simulation
-def run_option_3():
+def run_option_3(args):
+    from simulation.real_time_simulation import RealTimeSimulation, DEMO_TIME_SCALE
     print("\n--- Running Real-Time Simulation ---")
-    rt_sim = RealTimeSimulation()
-    rt_sim.run(verbose=False)
-    rt_sim.print_results()
+    rt_sim = RealTimeSimulation(seed=args.seed, scenarios=[args.scenario] if args.scenario else None)
+    if args.headless:
+        rt_sim.run()
+        # Only draw the pie charts when there is a file to write them to
+        rt_sim.print_results(plot=bool(args.output), filename=_figure_path(args.output, "success") if args.output else None)
+    else:
+        rt_sim.run(verbose=True, time_scale=DEMO_TIME_SCALE)
+        rt_sim.print_results()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rt_sim.kpis(), f, indent=2)
+        print(f"KPIs written to {args.output}")
 
 def main():
     # Set up argument parser
     parser = argparse.ArgumentParser(description="Run different simulation options.")
-    parser.add_argument("option", type=int, choices=[1, 2, 3], 
+    parser.add_argument("option", type=int, choices=[1, 2, 3],
                        help="Option to run: 1 for UI, 2 for standard simulation, 3 for real-time simulation")
+    parser.add_argument("--headless", action="store_true",
+                        help="Never open windows: save figures to files and run the real-time simulation unpaced")
+    parser.add_argument("--trips", type=int, default=10000, help="Number of trips (option 2)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--vectorized", action="store_true",
+                        help="Generate the trips with the NumPy batch engine (option 2)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes for a vectorized run (option 2; needs --vectorized)")
+    parser.add_argument("--output", help="Results file: trip CSV (option 2) or KPI JSON (option 3)")
+    parser.add_argument("--scenario", choices=SCENARIOS, help="Only simulate this demand scenario (option 3)")
 
     # Parse arguments
     args = parser.parse_args()
+    if args.workers > 1 and not args.vectorized:
+        parser.error("--workers needs --vectorized")
+    if args.headless:
+        # Non-interactive backend for any figure that gets drawn
+        os.environ["MPLBACKEND"] = "Agg"
 
     # Run the selected option
     if args.option == 1:
-        run_option_1()
+        run_option_1(args)
     elif args.option == 2:
-        run_option_2()
+        run_option_2(args)
     elif args.option == 3:
-        run_option_3()
+        run_option_3(args)
     else:
         print("Invalid")
 
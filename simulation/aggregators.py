@@ -0,0 +1,343 @@
+import math
+import numpy as np
+from typing import Dict, List, Union
+from .results import TripResults
+from .vehicle import Vehicle, FatBike, Car, Bus
+
+
+def expected_speeds(results: TripResults, vehicles: Dict[str, Vehicle]) -> np.ndarray:
+    """
+    Clear-weather speed of every trip, evaluating Vehicle.get_speed once per distinct traffic level.
+    """
+    cols = results.columns
+    speeds = np.empty(len(results))
+    for code in results.present_codes("vehicle"):
+        vehicle = vehicles[results.categories["vehicle"][code]]
+        mask = cols["vehicle"] == code
+        levels, inverse = np.unique(cols["traffic_level"][mask], return_inverse=True)
+        speeds[mask] = np.array([vehicle.get_speed(int(t)) for t in levels], dtype=float)[inverse]
+    return speeds
+
+
+class RunningStats:
+    """
+    Count, mean, variance (Welford), min and max of a stream of values.
+    Partial results from chunks or workers are combined with merge (Chan et al.).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return
+        other = RunningStats()
+        other.count = len(values)
+        other.mean = float(values.mean())
+        other.m2 = float(((values - other.mean) ** 2).sum())
+        other.min = float(values.min())
+        other.max = float(values.max())
+        self.merge(other)
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2, self.min, self.max = other.count, other.mean, other.m2, other.min, other.max
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def total(self) -> float:
+        return self.mean * self.count
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class DelayCounter:
+    """
+    Number of trips and of delayed trips, with the summed delay of the delayed ones.
+    """
+
+    def __init__(self, threshold: float = 0.1):
+        self.threshold = threshold  # hours (6 min)
+        self.count = 0
+        self.delayed = 0
+        self.total_delay = 0.0
+
+    def add(self, delay: float):
+        self.count += 1
+        if delay > self.threshold:
+            self.delayed += 1
+            self.total_delay += delay
+
+    def update(self, delays: np.ndarray):
+        delayed = delays > self.threshold
+        self.count += len(delays)
+        self.delayed += int(delayed.sum())
+        self.total_delay += float(delays[delayed].sum())
+
+    def merge(self, other: "DelayCounter") -> "DelayCounter":
+        self.count += other.count
+        self.delayed += other.delayed
+        self.total_delay += other.total_delay
+        return self
+
+    @property
+    def avg_delay(self) -> float:
+        return self.total_delay / self.delayed if self.delayed > 0 else 0.0
+
+
+class FixedBinSketch:
+    """
+    Streaming quantile sketch over fixed, equal-width bins between low and high.
+    Values outside the range are counted as under/overflow; exact min and max are kept,
+    so merging sketches with the same bins is exact.
+    """
+
+    def __init__(self, low: float, high: float, bins: int = 1000):
+        self.low = low
+        self.high = high
+        self.edges = np.linspace(low, high, bins + 1)
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum()) + self.underflow + self.overflow
+
+    def add(self, value: float):
+        self.update(np.array([value], dtype=float))
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        below = values < self.low
+        above = values >= self.high
+        self.underflow += int(below.sum())
+        self.overflow += int(above.sum())
+        inside = values[~(below | above)]
+        index = ((inside - self.low) / (self.high - self.low) * len(self.counts)).astype(np.int64)
+        self.counts += np.bincount(np.minimum(index, len(self.counts) - 1), minlength=len(self.counts))
+
+    def merge(self, other: "FixedBinSketch") -> "FixedBinSketch":
+        if len(other.counts) != len(self.counts) or other.low != self.low or other.high != self.high:
+            raise ValueError("Can only merge sketches with identical bins")
+        self.counts += other.counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q: float) -> float:
+        """
+        Approximate q-quantile (0-1), interpolating linearly within the bin it falls in.
+        """
+        total = self.count
+        if total == 0:
+            return math.nan
+        target = q * total
+        counts = np.concatenate(([self.underflow], self.counts, [self.overflow]))
+        cumulative = np.cumsum(counts)
+        i = int(np.searchsorted(cumulative, target, side="left"))
+        if i == 0:
+            return self.min
+        if i >= len(counts) - 1:
+            return self.max
+        lo, hi = self.edges[i - 1], self.edges[i]
+        fraction = (target - cumulative[i - 1]) / counts[i]
+        return float(min(max(lo + fraction * (hi - lo), self.min), self.max))
+
+
+class BufferedStats:
+    """
+    RunningStats and a FixedBinSketch fed one value at a time: values are collected in a small
+    buffer and folded in batch-wise, so memory stays bounded however many values are added.
+    """
+
+    def __init__(self, low: float, high: float, bins: int = 1000, buffer_size: int = 4096):
+        self.running = RunningStats()
+        self.sketch = FixedBinSketch(low, high, bins)
+        self.buffer_size = buffer_size
+        self.buffer: List[float] = []
+
+    def add(self, value: float):
+        self.buffer.append(value)
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            values = np.array(self.buffer, dtype=float)
+            self.running.update(values)
+            self.sketch.update(values)
+            self.buffer.clear()
+
+    def merge(self, other: "BufferedStats") -> "BufferedStats":
+        self.flush()
+        other.flush()
+        self.running.merge(other.running)
+        self.sketch.merge(other.sketch)
+        return self
+
+    @property
+    def count(self) -> int:
+        return self.running.count + len(self.buffer)
+
+    def stats(self) -> RunningStats:
+        self.flush()
+        return self.running
+
+    def quantile(self, q: float) -> float:
+        self.flush()
+        return self.sketch.quantile(q)
+
+
+def default_vehicles() -> Dict[str, Vehicle]:
+    return {v.name: v for v in (FatBike.shared(), Car.shared(), Bus.shared())}
+
+
+class TripSummary:
+    """
+    Single-pass, mergeable summary of trip results: per-vehicle running statistics,
+    weather counts, delays and a duration quantile sketch. Can be updated per trip or
+    per result chunk, and partial summaries from workers or chunks are combined with merge.
+    """
+
+    metrics = {
+        "emissions": "emissions_total_g",
+        "duration": "duration_hr",
+        "emissions_per_passenger": "emissions_per_passenger_g",
+        "distance": "distance_km",
+    }
+
+    def __init__(self, vehicles: Dict[str, Vehicle] = None, delay_threshold: float = 0.1,
+                 max_duration_hr: float = 5.0, duration_bins: int = 1000):
+        self.vehicles = vehicles if vehicles is not None else default_vehicles()
+        self.vehicle_stats: Dict[str, Dict[str, RunningStats]] = {}
+        self.weather_counts: Dict[str, int] = {}
+        self.delays = DelayCounter(delay_threshold)
+        self.durations = FixedBinSketch(0.0, max_duration_hr, duration_bins)
+
+    def _stats(self, vehicle: str) -> Dict[str, RunningStats]:
+        if vehicle not in self.vehicle_stats:
+            self.vehicle_stats[vehicle] = {key: RunningStats() for key in self.metrics}
+        return self.vehicle_stats[vehicle]
+
+    def add(self, trip: Dict):
+        """
+        Update with a single Trip.summary() dict.
+        """
+        stats = self._stats(trip["vehicle"])
+        for key, field in self.metrics.items():
+            stats[key].add(trip[field])
+        self.weather_counts[trip["weather"]] = self.weather_counts.get(trip["weather"], 0) + 1
+        # Delay: if duration is more than expected for clear weather by threshold
+        expected_speed = self.vehicles[trip["vehicle"]].get_speed(trip["traffic_level"])
+        expected_time = trip["distance_km"] / expected_speed if expected_speed > 0 else float('inf')
+        self.delays.add(trip["duration_hr"] - expected_time)
+        self.durations.add(trip["duration_hr"])
+
+    def update(self, chunk: Union[TripResults, List[Dict]]):
+        """
+        Update with a chunk of results (TripResults or list of trip summaries).
+        """
+        chunk = TripResults.coerce(chunk)
+        cols = chunk.columns
+        vehicle_names = chunk.categories["vehicle"]
+        for code in chunk.present_codes("vehicle"):
+            mask = cols["vehicle"] == code
+            stats = self._stats(vehicle_names[code])
+            for key, field in self.metrics.items():
+                stats[key].update(cols[field][mask])
+
+        weather_names = chunk.categories["weather"]
+        weather_counts = np.bincount(cols["weather"], minlength=len(weather_names))
+        for code in chunk.present_codes("weather"):
+            name = weather_names[code]
+            self.weather_counts[name] = self.weather_counts.get(name, 0) + int(weather_counts[code])
+
+        # Delay: if duration is more than expected for clear weather by threshold
+        expected_speed = expected_speeds(chunk, self.vehicles)
+        expected_time = np.full(len(chunk), np.inf)
+        np.divide(cols["distance_km"], expected_speed, out=expected_time, where=expected_speed > 0)
+        self.delays.update(cols["duration_hr"] - expected_time)
+        self.durations.update(cols["duration_hr"])
+
+    def merge(self, other: "TripSummary") -> "TripSummary":
+        for vehicle, stats in other.vehicle_stats.items():
+            own = self._stats(vehicle)
+            for key in self.metrics:
+                own[key].merge(stats[key])
+        for weather, count in other.weather_counts.items():
+            self.weather_counts[weather] = self.weather_counts.get(weather, 0) + count
+        self.delays.merge(other.delays)
+        self.durations.merge(other.durations)
+        return self
+
+    @property
+    def total_trips(self) -> int:
+        return self.delays.count
+
+    @property
+    def total_distance(self) -> float:
+        return sum(stats["distance"].total for stats in self.vehicle_stats.values())
+
+    def result(self) -> Dict:
+        """
+        Summary in the layout of plotting.summarize_for_plot; the raw duration list is
+        replaced by duration quantiles from the sketch.
+        """
+        summary = {}
+        for v, stats in self.vehicle_stats.items():
+            summary[v] = {
+                "total_emissions": stats["emissions"].total,
+                "total_time": stats["duration"].total,
+                "total_emissions_per_passenger": stats["emissions_per_passenger"].total,
+                "count": stats["emissions"].count,
+                "avg_emissions": stats["emissions"].mean,
+                "avg_time": stats["duration"].mean,
+                "avg_emissions_per_passenger": stats["emissions_per_passenger"].mean,
+                "std_emissions": stats["emissions"].std,
+                "std_time": stats["duration"].std,
+            }
+        summary["weather_distribution"] = dict(self.weather_counts)
+        summary["duration_quantiles"] = {q: self.durations.quantile(q) for q in (0.05, 0.25, 0.5, 0.75, 0.95)}
+        summary["delayed_trips"] = self.delays.delayed
+        summary["total_trips"] = self.total_trips
+        summary["avg_delay_min"] = self.delays.avg_delay * 60
+        summary["total_distance_km"] = self.total_distance
+        return summary
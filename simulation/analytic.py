@@ -0,0 +1,127 @@
+import math
+from typing import Dict, List, Tuple
+from .city import City
+from .vehicle import Vehicle
+from .aggregators import TripSummary
+from .batch import (CAR_PASSENGERS, CAR_PASSENGER_WEIGHTS, BUS_PASSENGER_MEAN, BUS_PASSENGER_STD,
+                    BUS_MIN_PASSENGERS, WEATHER_WEIGHTS)
+
+
+def _normal_cdf(x: float, mean: float, std: float) -> float:
+    return 0.5 * (1 + math.erf((x - mean) / (std * math.sqrt(2))))
+
+
+def bus_passenger_distribution(capacity: int, mean: float = BUS_PASSENGER_MEAN, std: float = BUS_PASSENGER_STD,
+                               minimum: int = BUS_MIN_PASSENGERS) -> Dict[int, float]:
+    """
+    Exact distribution of max(minimum, min(capacity, int(random.gauss(mean, std)))).
+    int() truncates towards zero, so int(X) = k for k >= 1 exactly when k <= X < k + 1.
+    """
+    cdf = lambda x: _normal_cdf(x, mean, std)
+    dist = {minimum: cdf(minimum + 1)}  # everything truncated to <= minimum is clamped up
+    for k in range(minimum + 1, capacity):
+        dist[k] = cdf(k + 1) - cdf(k)
+    dist[capacity] = 1 - cdf(capacity)
+    return dist
+
+
+def passenger_distribution(vehicle: Vehicle) -> Dict[int, float]:
+    """
+    Passenger distribution used by City.generate_random_trip for each vehicle type.
+    """
+    if vehicle.name == "Bus":
+        return bus_passenger_distribution(vehicle.capacity)
+    if vehicle.name == "Car":
+        return {int(p): float(w) for p, w in zip(CAR_PASSENGERS, CAR_PASSENGER_WEIGHTS)}
+    return {1: 1.0}
+
+
+def expected_summary(city: City, time_of_day: str = "rush_hour", delay_threshold: float = 0.1) -> Dict:
+    """
+    Exact expectation of the trip model, obtained by enumerating every (OD pair, vehicle, weather)
+    combination with its probability (OD pairs weighted by the City's demand) instead of
+    sampling. Passengers only enter through 1 / passengers, whose expectation is taken from the
+    exact passenger distribution.
+
+    Returns per-vehicle means and variances of emissions, duration and emissions per passenger,
+    the weather distribution, and delay probability / mean delay, mirroring TripSummary.result().
+    """
+    pairs: List[Tuple[str, str]] = [(city.places[i], city.places[j])
+                                    for i, j in zip(city.pair_origin, city.pair_destination)]
+    vehicle_prob = 1 / len(city.vehicles)
+    weather_total = sum(WEATHER_WEIGHTS)
+    weather_probs = {w: weight / weather_total for w, weight in zip(city.weather_types, WEATHER_WEIGHTS)}
+
+    pair_data = []
+    for (origin, destination), pair_prob in zip(pairs, city.pair_probabilities):
+        traffic = city.random_traffic_level(origin, destination, time_of_day)
+        pair_data.append((city.od_distance(origin, destination, "car"), city.od_distance(origin, destination, "bike"),
+                          traffic, float(pair_prob)))
+
+    summary = {}
+    delay_prob = 0.0
+    delay_mass = 0.0
+    for vehicle in city.vehicles:
+        passengers = passenger_distribution(vehicle)
+        inv_p = sum(prob / p for p, prob in passengers.items())
+        inv_p2 = sum(prob / (p * p) for p, prob in passengers.items())
+        moments = {"emissions": [0.0, 0.0], "duration": [0.0, 0.0], "emissions_per_passenger": [0.0, 0.0],
+                   "distance": [0.0, 0.0]}
+        for car_km, bike_km, traffic, pair_prob in pair_data:
+            distance = bike_km if vehicle.name == "FatBike" else car_km
+            base_speed = vehicle.get_speed(traffic)
+            expected_time = distance / base_speed if base_speed > 0 else float('inf')
+            for weather, w_prob in weather_probs.items():
+                effects = city.weather_effects[weather]
+                prob = pair_prob * w_prob
+                speed = base_speed * effects["speed_factor"]
+                duration = distance / speed if speed > 0 else float('inf')
+                total = vehicle.emissions_per_km * distance * effects["emission_factor"] + vehicle.embodied_emissions
+                for key, value, value_sq in (("emissions", total, total * total),
+                                             ("duration", duration, duration * duration),
+                                             ("emissions_per_passenger", total * inv_p, total * total * inv_p2),
+                                             ("distance", distance, distance * distance)):
+                    moments[key][0] += prob * value
+                    moments[key][1] += prob * value_sq
+                delay = duration - expected_time
+                if delay > delay_threshold:
+                    delay_prob += vehicle_prob * prob
+                    delay_mass += vehicle_prob * prob * delay
+        summary[vehicle.name] = {"probability": vehicle_prob}
+        for key, (mean, mean_sq) in moments.items():
+            summary[vehicle.name][f"avg_{key}"] = mean
+            summary[vehicle.name][f"var_{key}"] = max(0.0, mean_sq - mean * mean)
+        summary[vehicle.name]["avg_time"] = summary[vehicle.name]["avg_duration"]
+
+    summary["weather_distribution"] = weather_probs
+    summary["delay_probability"] = delay_prob
+    summary["avg_delay_min"] = delay_mass / delay_prob * 60 if delay_prob > 0 else 0
+    summary["avg_distance_km"] = sum(summary[v.name]["avg_distance"] * vehicle_prob for v in city.vehicles)
+    return summary
+
+
+def expected_co2_saved(expected: Dict, num_trips: int, car_shift: float = 1.0) -> float:
+    """
+    Expected CO2 saving (g) reported by Simulation.summarize_results for num_trips trips.
+    """
+    return (expected["Car"]["avg_emissions"] - expected["FatBike"]["avg_emissions"]) * num_trips * car_shift
+
+
+def compare_to_expected(summary: TripSummary, expected: Dict) -> List[Tuple[str, float, float, float]]:
+    """
+    Check a Monte Carlo TripSummary against the exact expectation.
+    Returns (metric, simulated mean, exact mean, z-score) per vehicle metric; with a correct
+    engine the z-scores behave like standard normal draws.
+    """
+    rows = []
+    for vehicle, stats in summary.vehicle_stats.items():
+        for key in ("emissions", "duration", "emissions_per_passenger"):
+            running = stats[key]
+            exact_mean = expected[vehicle][f"avg_{key}"]
+            std_error = math.sqrt(expected[vehicle][f"var_{key}"] / running.count) if running.count else 0.0
+            if std_error > 0:
+                z = (running.mean - exact_mean) / std_error
+            else:
+                z = 0.0 if math.isclose(running.mean, exact_mean, rel_tol=1e-9) else math.inf
+            rows.append((f"{vehicle}.{key}", running.mean, exact_mean, z))
+    return rows
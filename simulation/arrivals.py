@@ -0,0 +1,84 @@
+import math
+import numpy as np
+from typing import Dict
+from .batch import BatchEngine
+
+# Passengers on a fat bike taxi ride: rider + customer
+TAXI_PASSENGERS = 2
+
+
+class ArrivalStream:
+    """
+    One day's ride requests of a scenario as parallel arrays, sorted by request time:
+    time (minutes, fractional), OD place ids, weather code, ride distance and duration,
+    and the customer's patience in extra minutes after the timeout (inf: never cancels).
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], places):
+        self.columns = columns
+        self.places = places
+        self.time = columns["time"]
+        self.origin = columns["origin"]
+        self.destination = columns["destination"]
+        self.distance_km = columns["distance_km"]
+        self.duration_min = columns["duration_min"]
+        self.patience = columns["patience"]
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def ticks(self, ticks_per_minute: int = 1) -> np.ndarray:
+        """
+        Request times quantized to whole clock ticks (rounded down).
+        """
+        return np.floor(self.time * ticks_per_minute).astype(np.int64)
+
+
+def poisson_arrival_times(rates_per_minute: np.ndarray, rng: np.random.Generator,
+                          slot_minutes: float = 1.0) -> np.ndarray:
+    """
+    Non-homogeneous Poisson process with a piecewise-constant rate (requests per minute) over
+    consecutive slots of slot_minutes: Poisson counts per slot, each arrival placed uniformly
+    within its slot. Returns sorted times in minutes.
+    """
+    counts = rng.poisson(rates_per_minute * slot_minutes)
+    starts = np.arange(len(rates_per_minute), dtype=float) * slot_minutes
+    times = np.repeat(starts, counts) + rng.random(int(counts.sum())) * slot_minutes
+    times.sort()
+    return times
+
+
+def generate_arrival_stream(engine: BatchEngine, rates_per_minute: np.ndarray, rng: np.random.Generator,
+                            cancel_prob: float, time_of_day: str = "rush_hour",
+                            slot_minutes: float = 1.0) -> ArrivalStream:
+    """
+    Draw a day of fat bike taxi requests in one batch: arrival times, OD pairs (demand-weighted),
+    weather and patience, with ride distance and duration evaluated by the batch engine so they
+    match City.generate_fatbike_taxi_trip.
+    """
+    city = engine.city
+    times = poisson_arrival_times(rates_per_minute, rng, slot_minutes)
+    n = len(times)
+    tables = engine.pair_tables(city.pair_origin, city.pair_destination, time_of_day)
+    draws = {
+        "pair": city.pair_sampler.sample_array(n, rng),
+        "vehicle": np.full(n, engine.vehicle_names.index("FatBike")),
+        "weather": rng.choice(len(engine.weather_types), size=n, p=engine.weather_probs),
+        "passengers": np.full(n, TAXI_PASSENGERS),
+    }
+    trips = engine.evaluate(draws, tables)
+    # Patience: failed cancel draws (probability cancel_prob per minute) after the timeout
+    if cancel_prob <= 0:
+        patience = np.full(n, math.inf)
+    else:
+        patience = (rng.geometric(min(cancel_prob, 1.0), size=n) - 1).astype(float)
+    columns = {
+        "time": times,
+        "origin": trips["origin"],
+        "destination": trips["destination"],
+        "weather": draws["weather"],
+        "distance_km": trips["distance_km"],
+        "duration_min": np.rint(trips["duration_hr"] * 60).astype(np.int64),
+        "patience": patience,
+    }
+    return ArrivalStream(columns, engine.places)
@@ -0,0 +1,229 @@
+import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Tuple
+from .city import City
+from .results import TripResults
+from .sampling import AliasTable
+from .lookup import MAX_TRAFFIC_LEVEL, stack_tables
+
+# Passenger distributions used by City.generate_random_trip
+CAR_PASSENGERS = np.array([1, 2, 3, 4])
+CAR_PASSENGER_WEIGHTS = np.array([60, 25, 10, 5]) / 100
+BUS_PASSENGER_MEAN = 25
+BUS_PASSENGER_STD = 10
+BUS_MIN_PASSENGERS = 5
+WEATHER_WEIGHTS = [60, 25, 10, 5]
+# Trips per independently seeded block; the unit of work handed to parallel workers
+BLOCK_SIZE = 65536
+# Smaller runs are split into about TARGET_BLOCKS blocks (of at least MIN_BLOCK_SIZE trips) so
+# they can still be spread over workers; see run_block_size
+TARGET_BLOCKS = 64
+MIN_BLOCK_SIZE = 1024
+
+
+class BatchEngine:
+    """
+    Vectorized counterpart of City.generate_random_trip / Trip.summary.
+    Samples whole batches of trips as NumPy arrays and evaluates the Trip/Vehicle
+    formulas with array kernels. Trips are drawn from a NumPy Generator rather than the random
+    module, so the formulas and distributions match the scalar path, not the individual trips.
+    """
+
+    def __init__(self, city: City):
+        self.city = city
+        self.places = city.places
+
+        self.vehicle_names = [v.name for v in city.vehicles]
+        self.capacity = np.array([v.capacity for v in city.vehicles])
+        self.embodied_emissions = np.array([v.embodied_emissions for v in city.vehicles], dtype=float)
+        self.uses_bike_distance = np.array([v.name == "FatBike" for v in city.vehicles])
+        self.bus_code = self.vehicle_names.index("Bus") if "Bus" in self.vehicle_names else -1
+        self.car_code = self.vehicle_names.index("Car") if "Car" in self.vehicle_names else -1
+
+        self.weather_types = list(city.weather_types)
+        weights = np.array(WEATHER_WEIGHTS, dtype=float)
+        self.weather_probs = weights / weights.sum()
+        # speed[vehicle, traffic_level, weather] and emissions_per_km[vehicle, weather] from the City's lookup tables
+        self.speed, self.emissions_per_km = stack_tables([city.vehicle_tables[name] for name in self.vehicle_names])
+
+        self._pair_cache: Dict[Tuple, Dict[str, np.ndarray]] = {}
+
+    def pair_tables(self, origin_ids: np.ndarray, destination_ids: np.ndarray, time_of_day: str) -> Dict[str, np.ndarray]:
+        """
+        Resolve per-pair distances and traffic levels once per (pairs, time_of_day), using the
+        City's compiled distance arrays and the same TrafficModel methods as the scalar path.
+        """
+        key = (origin_ids.tobytes(), destination_ids.tobytes(), time_of_day)
+        if key in self._pair_cache:
+            return self._pair_cache[key]
+        names = [(self.places[i], self.places[j]) for i, j in zip(origin_ids, destination_ids)]
+        if self.city.use_real_data:
+            car_km = np.array([self.city.od_distance(o, d, "car") for o, d in names], dtype=float)
+            bike_km = np.array([self.city.od_distance(o, d, "bike") for o, d in names], dtype=float)
+        else:
+            car_km = self.city.car_km[origin_ids, destination_ids]
+            bike_km = self.city.bike_km[origin_ids, destination_ids]
+        missing = np.isnan(car_km) | np.isnan(bike_km)
+        if missing.any():
+            origin, destination = names[int(np.argmax(missing))]
+            raise ValueError(f"No distance available for OD pair {origin} -> {destination}")
+        traffic = np.array([self.city.random_traffic_level(o, d, time_of_day) for o, d in names], dtype=np.int64)
+        if ((traffic < 0) | (traffic > MAX_TRAFFIC_LEVEL)).any():
+            raise ValueError(f"Traffic levels must lie in 0-{MAX_TRAFFIC_LEVEL} for the batch engine")
+        tables = {
+            "car_km": car_km,
+            "bike_km": bike_km,
+            "traffic": traffic,
+            "origin": origin_ids,
+            "destination": destination_ids,
+        }
+        self._pair_cache[key] = tables
+        return tables
+
+    def _pair_ids(self, origin: str = None, destination: str = None) -> Tuple[np.ndarray, np.ndarray]:
+        if origin is None:
+            return self.city.pair_origin, self.city.pair_destination
+        for place in (origin, destination):
+            if place not in self.city.place_index:
+                raise ValueError(f"Unknown place: {place}")
+        return np.array([self.city.place_index[origin]]), np.array([self.city.place_index[destination]])
+
+    def sample(self, n: int, rng: np.random.Generator, pair_sampler: AliasTable = None) -> Dict[str, np.ndarray]:
+        """
+        Draw the random inputs of n trips: OD pair index (demand-weighted through the alias table,
+        or always 0 for a single fixed pair), vehicle code, weather code and passengers.
+        """
+        pair = pair_sampler.sample_array(n, rng) if pair_sampler is not None else np.zeros(n, dtype=np.int64)
+        vehicle = rng.integers(len(self.vehicle_names), size=n)
+        weather = rng.choice(len(self.weather_types), size=n, p=self.weather_probs)
+
+        passengers = np.ones(n, dtype=np.int64)
+        is_car = vehicle == self.car_code
+        passengers[is_car] = rng.choice(CAR_PASSENGERS, size=int(is_car.sum()), p=CAR_PASSENGER_WEIGHTS)
+        is_bus = vehicle == self.bus_code
+        if is_bus.any():
+            # int() truncates towards zero, as does astype on the Gaussian draw
+            bus = rng.normal(BUS_PASSENGER_MEAN, BUS_PASSENGER_STD, size=int(is_bus.sum())).astype(np.int64)
+            passengers[is_bus] = np.clip(bus, BUS_MIN_PASSENGERS, self.capacity[self.bus_code])
+        return {"pair": pair, "vehicle": vehicle, "weather": weather, "passengers": passengers}
+
+    def evaluate(self, draws: Dict[str, np.ndarray], tables: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Array kernels for Trip.get_duration_hours, get_total_emissions and get_emissions_per_passenger.
+        """
+        pair, vehicle, weather, passengers = draws["pair"], draws["vehicle"], draws["weather"], draws["passengers"]
+        distance = np.where(self.uses_bike_distance[vehicle], tables["bike_km"][pair], tables["car_km"][pair])
+        speed = self.speed[vehicle, tables["traffic"][pair], weather]
+        duration = np.full(len(pair), np.inf)
+        np.divide(distance, speed, out=duration, where=speed > 0)
+        operational = self.emissions_per_km[vehicle, weather] * distance
+        total = operational + self.embodied_emissions[vehicle]
+        return {
+            "vehicle": vehicle,
+            "origin": tables["origin"][pair],
+            "destination": tables["destination"][pair],
+            "distance_km": distance,
+            "traffic_level": tables["traffic"][pair],
+            "weather": weather,
+            "passengers": passengers,
+            "speed_kmh": speed,
+            "duration_hr": duration,
+            "emissions_operational_g": operational,
+            "emissions_total_g": total,
+            "emissions_per_passenger_g": total / passengers,
+        }
+
+    def run(self, n: int, rng: np.random.Generator, time_of_day: str = "rush_hour",
+            origin: str = None, destination: str = None) -> Dict[str, np.ndarray]:
+        """
+        Simulate n trips, either over random OD pairs or for a single origin/destination.
+        Returns a dict of equally long arrays (categorical fields hold integer codes).
+        """
+        tables = self.pair_tables(*self._pair_ids(origin, destination), time_of_day)
+        draws = self.sample(n, rng, self.city.pair_sampler if origin is None else None)
+        return self.evaluate(draws, tables)
+
+    def run_blocks(self, n: int, seed: int, stream: int = 0, time_of_day: str = "rush_hour",
+                   origin: str = None, destination: str = None, workers: int = 1,
+                   block_size: int = BLOCK_SIZE) -> Dict[str, np.ndarray]:
+        """
+        Simulate n trips split into fixed-size blocks, each with its own RNG stream derived from
+        (seed, stream, block index). Blocks are spread over a process pool when workers > 1 and merged
+        in block order, so the output for a given seed does not depend on the number of workers.
+        """
+        chunks = list(self.iter_blocks(n, seed, stream, time_of_day, origin, destination, workers, block_size))
+        if not chunks:
+            return self.run(0, np.random.default_rng(seed), time_of_day, origin, destination)
+        return {key: np.concatenate([chunk[key] for chunk in chunks]) for key in chunks[0]}
+
+    def iter_blocks(self, n: int, seed: int, stream: int = 0, time_of_day: str = "rush_hour",
+                    origin: str = None, destination: str = None, workers: int = 1,
+                    block_size: int = BLOCK_SIZE) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Lazily yield the blocks of run_blocks in order. With workers > 1 at most two blocks per
+        worker are in flight, so memory stays flat however many trips are requested.
+        """
+        # Resolve per-pair tables up front so workers never hit City (or the traffic API) themselves
+        self.pair_tables(*self._pair_ids(origin, destination), time_of_day)
+        sizes = block_sizes(n, block_size)
+        tasks = ((size, np.random.SeedSequence(seed, spawn_key=(stream, block)), time_of_day, origin, destination)
+                 for block, size in enumerate(sizes))
+        if workers > 1 and len(sizes) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(sizes)), initializer=_init_worker,
+                                     initargs=(self,)) as pool:
+                pending = deque()
+                for task in tasks:
+                    pending.append(pool.submit(_run_block, task))
+                    if len(pending) >= 2 * workers:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+        else:
+            for task in tasks:
+                yield self._run_block(*task)
+
+    def _run_block(self, n: int, seed_seq: np.random.SeedSequence, time_of_day: str,
+                   origin: str, destination: str) -> Dict[str, np.ndarray]:
+        return self.run(n, np.random.default_rng(seed_seq), time_of_day, origin, destination)
+
+    def to_results(self, columns: Dict[str, np.ndarray]) -> TripResults:
+        """
+        Wrap batch columns in a columnar TripResults sharing the engine's category labels.
+        """
+        categories = {
+            "vehicle": self.vehicle_names,
+            "origin": self.places,
+            "destination": self.places,
+            "weather": self.weather_types,
+        }
+        return TripResults(columns, categories)
+
+
+def run_block_size(n: int) -> int:
+    """
+    Default block size for a run of n trips. It depends on n only, never on the number of
+    workers, so the trips for a given seed stay the same for any worker count.
+    """
+    return min(BLOCK_SIZE, max(MIN_BLOCK_SIZE, -(-n // TARGET_BLOCKS)))
+
+
+def block_sizes(n: int, block_size: int = BLOCK_SIZE) -> List[int]:
+    """
+    Split n trips into consecutive blocks of block_size (the last one may be shorter).
+    """
+    full, rest = divmod(n, block_size)
+    return [block_size] * full + ([rest] if rest else [])
+
+
+# Engine held by each worker process of BatchEngine.run_blocks
+_worker_engine: BatchEngine = None
+
+
+def _init_worker(engine: BatchEngine):
+    global _worker_engine
+    _worker_engine = engine
+
+
+def _run_block(task) -> Dict[str, np.ndarray]:
+    return _worker_engine._run_block(*task)
@@ -0,0 +1,244 @@
+import os
+import csv
+import json
+import hashlib
+import numpy as np
+from typing import Dict, List, Tuple
+
+# Bump when the layout of the bundle changes, so older bundles are rebuilt
+BUNDLE_VERSION = 1
+BUNDLE_DIR = "data/.cache/city_bundle"
+SOURCES = {
+    "od_csv": "simulation/Origin to POI.csv",
+    "od_weights_csv": "simulation/OD demand weights.csv",
+    "geojson": "data/buurten.geojson",
+    "destinations": "data/destination_coordinates.json",
+}
+
+
+def read_od_csv(csv_path: str = SOURCES["od_csv"]) -> Dict[Tuple[str, str], Dict[str, float]]:
+    """
+    Car and bike distances (km, None when missing) per (origin, destination) row of the OD CSV;
+    rows without an origin continue the previous origin.
+    """
+    od_matrix = {}
+    with open(csv_path, encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        current_origin = None
+        for row in reader:
+            origin = row["Origin"].strip() if row["Origin"].strip() else current_origin
+            if not origin:
+                continue
+            current_origin = origin
+            destination = row["Destination"].strip()
+            if not destination:
+                continue
+            try:
+                car_dist = float(row['Distance (by car, in km)']) if row['Distance (by car, in km)'] else None
+                bike_dist = float(row['Distance (by bike, in km)']) if row['Distance (by bike, in km)'] else None
+            except Exception:
+                car_dist = None
+                bike_dist = None
+            if car_dist is not None or bike_dist is not None:
+                od_matrix[(origin, destination)] = {"car": car_dist, "bike": bike_dist}
+    return od_matrix
+
+
+def read_od_weights(csv_path: str = SOURCES["od_weights_csv"]) -> Dict[Tuple[str, str], float]:
+    """
+    Relative demand per OD pair. Pairs that are not listed (or a missing file) get weight 1.
+    """
+    weights = {}
+    if not os.path.exists(csv_path):
+        return weights
+    with open(csv_path, encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            if len(row) < 3 or not row[0].strip() or not row[1].strip():
+                continue
+            try:
+                weights[(row[0].strip(), row[1].strip())] = float(row[2])
+            except ValueError:
+                continue
+    return weights
+
+
+def source_hashes(sources: Dict[str, str] = None) -> Dict[str, str]:
+    """
+    SHA-256 of every source file ("" for a missing optional file).
+    """
+    hashes = {}
+    for key, path in (sources or SOURCES).items():
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                hashes[key] = hashlib.sha256(f.read()).hexdigest()
+        else:
+            hashes[key] = ""
+    return hashes
+
+
+def build_city_bundle(bundle_dir: str = BUNDLE_DIR, sources: Dict[str, str] = None):
+    """
+    Parse the source files once and write the bundle: one .npy file per array plus a manifest
+    with the names, the bundle version and the hashes of the sources it was built from.
+    """
+    sources = sources or SOURCES
+    od = read_od_csv(sources["od_csv"])
+    weights = read_od_weights(sources["od_weights_csv"])
+    places = list(dict.fromkeys(place for pair in od for place in pair))
+    place_index = {p: i for i, p in enumerate(places)}
+
+    zones, centroids, rings, bounds = [], [], [], []
+    with open(sources["geojson"], "r", encoding="utf-8") as f:
+        for feature in json.load(f)["features"]:
+            props = feature["properties"]
+            geometry = feature["geometry"]
+            polygons = geometry["coordinates"] if geometry["type"] == "MultiPolygon" else [geometry["coordinates"]]
+            exteriors = [np.asarray(polygon[0], dtype=float)[:, :2] for polygon in polygons]
+            points = np.concatenate(exteriors)
+            point = props.get("geo_point_2d")
+            zones.append(props["buurtnaam"])
+            centroids.append((point["lat"], point["lon"]) if point else (points[:, 1].mean(), points[:, 0].mean()))
+            rings.append(exteriors)
+            bounds.append((points[:, 0].min(), points[:, 1].min(), points[:, 0].max(), points[:, 1].max()))
+    with open(sources["destinations"], "r", encoding="utf-8") as f:
+        destinations = json.load(f)
+    pois = list(destinations)
+
+    # Polygon exterior rings (lon, lat) as one vertex array: ring r spans ring_offsets[r]:ring_offsets[r + 1]
+    # and belongs to zone ring_zone[r]
+    ring_list = [(z, ring) for z, exteriors in enumerate(rings) for ring in exteriors]
+    ring_offsets = np.cumsum([0] + [len(ring) for _, ring in ring_list])
+    arrays = {
+        "od_origin": np.array([place_index[o] for o, _ in od], dtype=np.int32),
+        "od_destination": np.array([place_index[d] for _, d in od], dtype=np.int32),
+        "od_car_km": np.array([np.nan if m["car"] is None else m["car"] for m in od.values()], dtype=float),
+        "od_bike_km": np.array([np.nan if m["bike"] is None else m["bike"] for m in od.values()], dtype=float),
+        "weight_value": np.array(list(weights.values()), dtype=float),
+        "zone_centroid": np.array(centroids, dtype=float).reshape(-1, 2),
+        "zone_bounds": np.array(bounds, dtype=float).reshape(-1, 4),
+        "ring_vertices": np.concatenate([ring for _, ring in ring_list]) if ring_list else np.zeros((0, 2)),
+        "ring_offsets": ring_offsets.astype(np.int64),
+        "ring_zone": np.array([z for z, _ in ring_list], dtype=np.int32),
+        "poi_coordinates": np.array([(destinations[p]["latitude"], destinations[p]["longitude"]) for p in pois],
+                                    dtype=float).reshape(-1, 2),
+    }
+    manifest = {
+        "version": BUNDLE_VERSION,
+        "sources": source_hashes(sources),
+        "places": places,
+        "weight_pairs": [list(pair) for pair in weights],
+        "zones": zones,
+        "pois": pois,
+        "arrays": sorted(arrays),
+    }
+    os.makedirs(bundle_dir, exist_ok=True)
+    # Arrays first and the manifest last, each replaced atomically, so a reader never sees a
+    # manifest that points at missing arrays
+    for name, array in arrays.items():
+        tmp = os.path.join(bundle_dir, f"{name}.{os.getpid()}.tmp.npy")
+        np.save(tmp, array)
+        os.replace(tmp, os.path.join(bundle_dir, f"{name}.npy"))
+    tmp = os.path.join(bundle_dir, f"manifest.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, os.path.join(bundle_dir, "manifest.json"))
+
+
+class CityBundle:
+    """
+    The City's static data, memory-mapped from a bundle built from the source files: the OD table,
+    OD demand weights, neighbourhood names, centroids and polygon outlines, and POI coordinates.
+    """
+
+    def __init__(self, bundle_dir: str, manifest: Dict):
+        self.bundle_dir = bundle_dir
+        self.manifest = manifest
+        self.places: List[str] = manifest["places"]
+        self.zones: List[str] = manifest["zones"]
+        self.pois: List[str] = manifest["pois"]
+        self.arrays = {name: np.load(os.path.join(bundle_dir, f"{name}.npy"), mmap_mode="r")
+                       for name in manifest["arrays"]}
+
+    def __getattr__(self, name):
+        arrays = self.__dict__.get("arrays", {})
+        if name in arrays:
+            return arrays[name]
+        raise AttributeError(name)
+
+    def od_matrix(self) -> Dict[Tuple[str, str], Dict[str, float]]:
+        """
+        The OD table in the form of read_od_csv.
+        """
+        places = self.places
+        return {(places[i], places[j]): {"car": None if np.isnan(car) else float(car),
+                                         "bike": None if np.isnan(bike) else float(bike)}
+                for i, j, car, bike in zip(self.od_origin.tolist(), self.od_destination.tolist(),
+                                           self.od_car_km.tolist(), self.od_bike_km.tolist())}
+
+    def od_weights(self) -> Dict[Tuple[str, str], float]:
+        return {tuple(pair): w for pair, w in zip(self.manifest["weight_pairs"], self.weight_value.tolist())}
+
+    def destinations_by_origin(self) -> Dict[str, List[str]]:
+        destinations = {}
+        for (origin, destination) in self.od_matrix():
+            destinations.setdefault(origin, []).append(destination)
+        return destinations
+
+    def place_coordinates(self) -> Dict[str, Tuple[float, float]]:
+        """
+        (latitude, longitude) per place: neighbourhood centroids plus POIs, which take precedence.
+        """
+        coords = {zone: (float(lat), float(lon)) for zone, (lat, lon) in zip(self.zones, self.zone_centroid.tolist())}
+        coords.update((poi, (float(lat), float(lon))) for poi, (lat, lon) in zip(self.pois, self.poi_coordinates.tolist()))
+        return coords
+
+    def zone_polygons(self, zones: List[str] = None) -> List[np.ndarray]:
+        """
+        Exterior rings ((lon, lat) vertex arrays) of the given neighbourhoods, or of all of them.
+        """
+        wanted = None if zones is None else {self.zones.index(z) for z in zones if z in self.zones}
+        offsets = self.ring_offsets
+        return [self.ring_vertices[offsets[r]:offsets[r + 1]] for r, z in enumerate(self.ring_zone.tolist())
+                if wanted is None or z in wanted]
+
+    def total_bounds(self) -> np.ndarray:
+        """
+        (min lon, min lat, max lon, max lat) over all neighbourhoods.
+        """
+        b = self.zone_bounds
+        return np.array([b[:, 0].min(), b[:, 1].min(), b[:, 2].max(), b[:, 3].max()])
+
+
+_bundles: Dict[str, CityBundle] = {}
+
+
+def load_city_bundle(bundle_dir: str = BUNDLE_DIR, sources: Dict[str, str] = None) -> CityBundle:
+    """
+    The city bundle, rebuilt first when it is missing, of another version or older than its sources.
+    Loaded bundles are shared within the process.
+    """
+    sources = sources or SOURCES
+    hashes = source_hashes(sources)
+    bundle = _bundles.get(bundle_dir)
+    if bundle is not None and bundle.manifest["sources"] == hashes:
+        return bundle
+    manifest_path = os.path.join(bundle_dir, "manifest.json")
+    manifest = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    if manifest is None or manifest.get("version") != BUNDLE_VERSION or manifest.get("sources") != hashes:
+        build_city_bundle(bundle_dir, sources)
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    bundle = _bundles[bundle_dir] = CityBundle(bundle_dir, manifest)
+    return bundle
+
+
+if __name__ == "__main__":
+    build_city_bundle()
+    bundle = load_city_bundle()
+    print(f"Built city bundle v{BUNDLE_VERSION} in {BUNDLE_DIR}: {len(bundle.places)} places, "
+          f"{len(bundle.zones)} neighbourhoods, {len(bundle.pois)} POIs")
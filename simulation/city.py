@@ -1,11 +1,15 @@
 import random
 import os
-import csv
-from typing import List, Tuple
+import numpy as np
+from typing import Dict, List, Tuple
 from .vehicle import FatBike, Car, Bus
 from .trip import Trip
 from .traffic_model import TrafficModel
+from .sampling import AliasTable
+from .lookup import compile_vehicle_tables
+from .bundle import SOURCES, load_city_bundle, read_od_csv, read_od_weights
 from utils import traffic_api
+from utils.precompute_distances import DISTANCE_MATRIX_PATH, DistanceMatrix
 
 class City:
     def __init__(self, name: str = "Eindhoven", seed: int = None, use_real_data: bool = False):
@@ -14,16 +18,16 @@ class City:
         self.zones = ["Centrum", "Strijp-S", "TU/e", "Woensel", "Tongelre", "Gestel"]
         self.use_real_data = use_real_data or (os.environ.get("USE_REAL_TRAFFIC", "0") == "1")
 
-        # Load OD matrix from CSV
-        self.od_matrix = self.load_od_matrix_from_csv()
-        # Ensure bidirectionality for each mode
-        new_od_matrix = {}
-        for (src, dst), modes in self.od_matrix.items():
-            new_od_matrix[(src, dst)] = modes
-            new_od_matrix[(dst, src)] = modes
-        self.od_matrix = new_od_matrix
+        # Load the OD matrix from the city bundle (built from the CSVs) and compile it into integer
+        # ids and dense distance arrays
+        self.bundle = load_city_bundle()
+        self.compile_od_matrix(self.bundle.od_matrix(), self.bundle.od_weights())
+        if self.use_real_data:
+            self.prefetch_routes()
+        # Precomputed distances between all places (utils/precompute_distances.py), for pairs not in the CSV
+        self.distance_matrix = DistanceMatrix.load() if os.path.exists(DISTANCE_MATRIX_PATH) else None
 
-        self.vehicles = [FatBike(), Car(), Bus()]
+        self.vehicles = [FatBike.shared(), Car.shared(), Bus.shared()]
 
         self.traffic_profile = {
             "rush_hour": 80,
@@ -39,46 +43,131 @@ class City:
             "snow": {"speed_factor": 0.7, "emission_factor": 1.2},
             "fog": {"speed_factor": 0.8, "emission_factor": 1.05},
         }
+        self.weather_index = {w: i for i, w in enumerate(self.weather_types)}
+        # Speed/emission lookup tables per vehicle type, indexed by (traffic_level, weather)
+        self.vehicle_tables = compile_vehicle_tables(self.vehicles, self.weather_types, self.weather_effects)
 
         if seed is not None:
             random.seed(seed)
 
-    def load_od_matrix_from_csv(self):
-        od_matrix = {}
-        csv_path = 'simulation/Origin to POI.csv'
-        with open(csv_path, encoding="utf-8-sig") as f:
-            reader = csv.DictReader(f)
-            current_origin = None
-            for row in reader:
-                origin = row["Origin"].strip() if row["Origin"].strip() else current_origin
-                if not origin:
-                    continue
-                current_origin = origin
-                destination = row["Destination"].strip()
-                if not destination:
-                    continue
-                try:
-                    car_dist = float(row['Distance (by car, in km)']) if row['Distance (by car, in km)'] else None
-                    bike_dist = float(row['Distance (by bike, in km)']) if row['Distance (by bike, in km)'] else None
-                except Exception:
-                    car_dist = None
-                    bike_dist = None
-                if car_dist is not None or bike_dist is not None:
-                    od_matrix[(origin, destination)] = {"car": car_dist, "bike": bike_dist}
-        return od_matrix
+    def prefetch_routes(self):
+        """
+        Fill the route cache for every pair of places the traffic API has coordinates for, with
+        one matrix request; skipped when there are no such pairs or no API key is configured.
+        """
+        known = [p for p in self.places if p in traffic_api.ZONE_COORDS]
+        pairs = [(o, d) for o in known for d in known if o != d]
+        if pairs and traffic_api.has_api_key():
+            traffic_api.prefetch_routes(pairs)
+
+    def load_od_matrix_from_csv(self, csv_path: str = SOURCES["od_csv"]):
+        return read_od_csv(csv_path)
+
+    def load_od_weights_from_csv(self, csv_path: str = SOURCES["od_weights_csv"]) -> Dict[Tuple[str, str], float]:
+        """
+        Relative demand per OD pair. Pairs that are not listed (or a missing file) get weight 1.
+        """
+        return read_od_weights(csv_path)
+
+    def compile_od_matrix(self, od_matrix: Dict[Tuple[str, str], Dict[str, float]],
+                          weights: Dict[Tuple[str, str], float] = None):
+        """
+        Intern zone/POI names into integer ids and store distances in dense (origin, destination)
+        arrays per mode (NaN where no distance is known). Every pair is mirrored so the matrix is
+        bidirectional; sampleable pairs are kept as parallel id arrays in first-seen order, with an
+        alias table over their demand weights (a pair without its own weight uses its mirror's, else 1).
+        """
+        weights = weights or {}
+        self.places: List[str] = []
+        self.place_index: Dict[str, int] = {}
+        for pair in od_matrix:
+            for place in pair:
+                if place not in self.place_index:
+                    self.place_index[place] = len(self.places)
+                    self.places.append(place)
+        n = len(self.places)
+        self.car_km = np.full((n, n), np.nan)
+        self.bike_km = np.full((n, n), np.nan)
+        known = np.zeros((n, n), dtype=bool)
+        origins, destinations = [], []
+        for (src, dst), modes in od_matrix.items():
+            i, j = self.place_index[src], self.place_index[dst]
+            for a, b in ((i, j), (j, i)):
+                if not known[a, b]:
+                    known[a, b] = True
+                    origins.append(a)
+                    destinations.append(b)
+                self.car_km[a, b] = np.nan if modes["car"] is None else modes["car"]
+                self.bike_km[a, b] = np.nan if modes["bike"] is None else modes["bike"]
+        self.pair_origin = np.array(origins, dtype=np.int64)
+        self.pair_destination = np.array(destinations, dtype=np.int64)
+        pair_weights = []
+        for i, j in zip(origins, destinations):
+            src, dst = self.places[i], self.places[j]
+            pair_weights.append(weights.get((src, dst), weights.get((dst, src), 1.0)))
+        self.pair_sampler = AliasTable(pair_weights)
+        self.pair_probabilities = self.pair_sampler.probabilities
+        # Name-keyed view kept for callers that still look pairs up by name
+        self.od_matrix = {
+            (self.places[i], self.places[j]): {"car": self._km(self.car_km, i, j), "bike": self._km(self.bike_km, i, j)}
+            for i, j in zip(origins, destinations)
+        }
+
+    @staticmethod
+    def _km(matrix: np.ndarray, i: int, j: int) -> float:
+        value = matrix[i, j]
+        return None if np.isnan(value) else float(value)
+
+    @property
+    def zone_index(self):
+        """
+        Point-in-neighbourhood index over the bundle's buurten (built on first use; needs shapely).
+        """
+        if getattr(self, "_zone_index", None) is None:
+            from .zones import ZoneIndex
+            self._zone_index = ZoneIndex(self.bundle)
+        return self._zone_index
+
+    def locate_zones(self, lat, lon) -> List[str]:
+        """
+        Neighbourhood name for every (lat, lon) point (None outside the city).
+        """
+        return self.zone_index.names(self.zone_index.locate(lat, lon))
+
+    def nearest_zones(self, lat, lon) -> Tuple[List[str], np.ndarray]:
+        """
+        Name of and distance (km) to the nearest neighbourhood for every (lat, lon) point.
+        """
+        zones, distance = self.zone_index.nearest(lat, lon)
+        return self.zone_index.names(zones), distance
+
+    def random_od_pair_ids(self) -> Tuple[int, int]:
+        k = self.pair_sampler.sample(random)
+        return int(self.pair_origin[k]), int(self.pair_destination[k])
 
     def random_od_pair(self) -> Tuple[str, str]:
-        return random.choice(list(self.od_matrix.keys()))
+        i, j = self.random_od_pair_ids()
+        return self.places[i], self.places[j]
+
+    def od_distance_ids(self, i: int, j: int, mode: str = "car") -> float:
+        return self._km(self.bike_km if mode == "bike" else self.car_km, i, j)
+
+    def _trip_distance(self, i: int, j: int, mode: str) -> float:
+        if self.use_real_data:
+            return self.od_distance(self.places[i], self.places[j], mode)
+        return self.od_distance_ids(i, j, mode)
 
     def od_distance(self, origin: str, destination: str, mode: str = "car") -> float:
         if self.use_real_data:
             dist = traffic_api.get_real_distance(origin, destination)
             if dist:
                 return dist
-        d = self.od_matrix.get((origin, destination), None)
-        if isinstance(d, dict):
-            return d.get(mode, None)
-        return d
+        i = self.place_index.get(origin)
+        j = self.place_index.get(destination)
+        dist = self.od_distance_ids(i, j, mode) if i is not None and j is not None else None
+        if dist is None and self.distance_matrix is not None:
+            return self.distance_matrix.distance(origin, destination, mode)
+        return dist
 
     def random_traffic_level(self, origin: str, destination: str, time_of_day: str) -> int:
         if self.use_real_data:
@@ -91,31 +180,40 @@ class City:
         # Weighted random: clear is most common
         return random.choices(self.weather_types, weights=[60, 25, 10, 5])[0]
 
+    def random_passengers(self, vehicle) -> int:
+        # More realistic passenger distribution
+        if vehicle.name == "Bus":
+            passengers = int(random.gauss(25, 10))
+            return max(5, min(vehicle.capacity, passengers))
+        elif vehicle.name == "Car":
+            return random.choices([1, 2, 3, 4], weights=[60, 25, 10, 5])[0]
+        return 1
+
+    def build_trip(self, vehicle, origin: str, destination: str, distance: float, traffic: int,
+                   weather: str, passengers: int) -> Trip:
+        """
+        Create a fully initialised Trip, wiring in the weather effects and the vehicle's lookup table.
+        """
+        effects = self.weather_effects[weather]
+        return Trip(vehicle, distance, traffic, passengers,
+                    origin=origin,
+                    destination=destination,
+                    weather=weather,
+                    weather_speed_factor=effects["speed_factor"],
+                    weather_emission_factor=effects["emission_factor"],
+                    table=self.vehicle_tables[vehicle.name],
+                    weather_code=self.weather_index[weather])
+
     def generate_random_trip(self, time_of_day: str = "rush_hour") -> Trip:
-        origin, destination = self.random_od_pair()
+        i, j = self.random_od_pair_ids()
+        origin, destination = self.places[i], self.places[j]
         vehicle = random.choice(self.vehicles)
         mode = "bike" if vehicle.name == "FatBike" else "car"
-        distance = self.od_distance(origin, destination, mode)
+        distance = self._trip_distance(i, j, mode)
         traffic = self.random_traffic_level(origin, destination, time_of_day)
         weather = self.random_weather()
-        effects = self.weather_effects[weather]
-
-        # More realistic passenger distribution
-        if vehicle.name == "Bus":
-            passengers = int(random.gauss(25, 10))
-            passengers = max(5, min(vehicle.capacity, passengers))
-        elif vehicle.name == "Car":
-            passengers = random.choices([1, 2, 3, 4], weights=[60, 25, 10, 5])[0]
-        else:
-            passengers = 1
-
-        trip = Trip(vehicle, distance, traffic, passengers)
-        trip.origin = origin
-        trip.destination = destination
-        trip.weather = weather
-        trip.weather_speed_factor = effects["speed_factor"]
-        trip.weather_emission_factor = effects["emission_factor"]
-        return trip
+        passengers = self.random_passengers(vehicle)
+        return self.build_trip(vehicle, origin, destination, distance, traffic, weather, passengers)
 
     def generate_random_trip_for_od(self, origin: str, destination: str, time_of_day: str = "rush_hour") -> Trip:
         vehicle = random.choice(self.vehicles)
@@ -123,43 +221,19 @@ class City:
         distance = self.od_distance(origin, destination, mode)
         traffic = self.random_traffic_level(origin, destination, time_of_day)
         weather = self.random_weather()
-        effects = self.weather_effects[weather]
-
-        # More realistic passenger distribution
-        if vehicle.name == "Bus":
-            passengers = int(random.gauss(25, 10))
-            passengers = max(5, min(vehicle.capacity, passengers))
-        elif vehicle.name == "Car":
-            passengers = random.choices([1, 2, 3, 4], weights=[60, 25, 10, 5])[0]
-        else:
-            passengers = 1
-
-        trip = Trip(vehicle, distance, traffic, passengers)
-        trip.origin = origin
-        trip.destination = destination
-        trip.weather = weather
-        trip.weather_speed_factor = effects["speed_factor"]
-        trip.weather_emission_factor = effects["emission_factor"]
-        return trip
+        passengers = self.random_passengers(vehicle)
+        return self.build_trip(vehicle, origin, destination, distance, traffic, weather, passengers)
 
     def generate_fatbike_taxi_trip(self, time_of_day: str = "rush_hour") -> Trip:
         """
         Generate a trip where a customer is taken as a passenger on the back of a fat bike
         (Uber-like fat bike taxi service). Always uses a FatBike, random OD pair, and 2 passengers.
         """
-        origin, destination = self.random_od_pair()
-        fatbike = FatBike()
-        mode = "bike"
-        distance = self.od_distance(origin, destination, mode)
+        i, j = self.random_od_pair_ids()
+        origin, destination = self.places[i], self.places[j]
+        fatbike = FatBike.shared()
+        distance = self._trip_distance(i, j, "bike")
         traffic = self.random_traffic_level(origin, destination, time_of_day)
         weather = self.random_weather()
-        effects = self.weather_effects[weather]
         passengers = 2  # Always 2: rider + customer
-        trip = Trip(fatbike, distance, traffic, passengers)
-        trip.origin = origin
-        trip.destination = destination
-        trip.weather = weather
-        trip.weather_speed_factor = effects["speed_factor"]
-        trip.weather_emission_factor = effects["emission_factor"]
-        return trip
-
+        return self.build_trip(fatbike, origin, destination, distance, traffic, weather, passengers)
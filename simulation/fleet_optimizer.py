@@ -0,0 +1,236 @@
+import math
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+from .real_time_simulation import RealTimeSimulation
+from .replications import replication_seeds
+
+# Rider counts per time block, as a hashable ((block, riders), ...) tuple in time-block order
+Config = Tuple[Tuple[str, int], ...]
+
+# Candidates whose improvement is this many standard errors below the leader's are dropped early
+EARLY_STOP_SE = 2.0
+# Seeds per round between early-stopping checks (fixed, so results do not depend on the number of workers)
+ROUND_SEEDS = 4
+
+
+# Simulations (one per scenario) and arrival streams (per scenario and seed) held by each worker process
+_worker_args = None
+_worker_sims: Dict[str, RealTimeSimulation] = {}
+_worker_arrivals: Dict[Tuple[str, int], Dict] = {}
+
+
+def _init_worker(demand_json_path: str, timeout_min: int, cancel_prob: float, dispatch: str):
+    global _worker_args
+    _worker_args = (demand_json_path, timeout_min, cancel_prob, dispatch)
+    _worker_sims.clear()
+    _worker_arrivals.clear()
+
+
+def _evaluate(task) -> Dict[str, float]:
+    """
+    KPIs of one scenario for one rider configuration and seed. The arrivals only depend on the
+    scenario and seed, so every configuration is evaluated on the same days (common random numbers).
+    """
+    scenario, config, seed = task
+    demand_json_path, timeout_min, cancel_prob, dispatch = _worker_args
+    sim = _worker_sims.get(scenario)
+    if sim is None:
+        sim = RealTimeSimulation(demand_json_path, timeout_min=timeout_min, cancel_prob=cancel_prob,
+                                 scenarios=[scenario])
+        sim.logger.setLevel("WARNING")
+        _worker_sims[scenario] = sim
+    sim.reseed(seed)
+    arrivals = _worker_arrivals.get((scenario, seed))
+    if arrivals is None:
+        arrivals = _worker_arrivals[(scenario, seed)] = sim.generate_arrivals()
+    sim.set_riders(dict(config))
+    sim.run(arrivals=arrivals, dispatch=dispatch)
+    return sim.kpis()[scenario]
+
+
+class FleetOptimizer:
+    """
+    Searches the number of riders per time block that meets a service target at the lowest cost
+    (rider-hours), separately per scenario, by simulating candidate fleets on the event engine.
+
+    The search is greedy: starting from a load-based lower bound it adds a rider to the block that
+    reduces the shortfall from the target most per rider-hour, until the target is met, and then
+    removes riders wherever the target still holds. Candidates are simulated on the same seeds
+    (common random numbers), in rounds spread over a process pool, and candidates that are clearly
+    worse than the best one are dropped before all seeds have been run.
+    """
+
+    def __init__(self, demand_json_path: str = "data/daily_demand.json", seeds: int = 10, seed: int = 42,
+                 workers: int = 1, target_success: float = 0.95, target_p90_wait: float = None,
+                 timeout_min: int = 5, cancel_prob: float = 0.8, dispatch: str = "fifo", min_riders: int = 1,
+                 max_iterations: int = 500):
+        self.demand_json_path = demand_json_path
+        self.seeds = replication_seeds(seed, seeds)
+        self.workers = workers
+        self.target_success = target_success
+        self.target_p90_wait = target_p90_wait
+        self.timeout_min = timeout_min
+        self.cancel_prob = cancel_prob
+        self.dispatch = dispatch
+        self.min_riders = min_riders
+        self.max_iterations = max_iterations
+        self.sim = RealTimeSimulation(demand_json_path, seed=seed, timeout_min=timeout_min, cancel_prob=cancel_prob)
+        self.sim.logger.setLevel("WARNING")
+        timeline = self.sim.timelines["weekday"]
+        self.blocks = timeline.block_names
+        self.block_hours = {block: minutes / 60 for block, minutes in timeline.block_minutes().items()}
+        self.cache: Dict[Tuple[str, Config, int], Dict[str, float]] = {}
+        self.pool = None
+
+    def cost(self, config: Config) -> float:
+        """
+        Rider-hours of a configuration over the day.
+        """
+        return sum(riders * self.block_hours[block] for block, riders in config)
+
+    def lower_bound(self, scenario: str) -> Config:
+        """
+        Riders per block needed to keep up with the offered load (arrival rate x mean ride time);
+        with fewer riders the queue grows without bound over the block.
+        """
+        timeline = self.sim.timelines["weekday"]
+        self.sim.reseed(self.seeds[0])
+        ride_min = float(np.mean([stream.duration_min.mean()
+                                  for stream in self.sim.generate_arrivals().values() if len(stream)]))
+        rates = timeline.rates[scenario]
+        config = []
+        for b, block in enumerate(self.blocks):
+            load = float(rates[timeline.block_ids == b].mean()) * ride_min
+            config.append((block, max(self.min_riders, int(math.floor(load)))))
+        return tuple(config)
+
+    def shortfall(self, kpis: Dict[str, float]) -> float:
+        """
+        Distance of one run from the targets: missing success rate plus relative excess p90 wait.
+        """
+        gap = max(0.0, self.target_success - kpis["success_rate"])
+        if self.target_p90_wait is not None:
+            gap += max(0.0, kpis["p90_wait"] - self.target_p90_wait) / self.target_p90_wait
+        return gap
+
+    def feasible(self, kpis: Dict[str, float]) -> bool:
+        if kpis["success_rate"] < self.target_success:
+            return False
+        return self.target_p90_wait is None or kpis["p90_wait"] <= self.target_p90_wait
+
+    def evaluate(self, scenario: str, configs: List[Config], seeds: List[int]) -> Dict[Config, List[Dict]]:
+        """
+        KPIs per configuration for each of the given seeds; runs that were simulated before are reused.
+        """
+        tasks = [(scenario, config, seed) for config in configs for seed in seeds
+                 if (scenario, config, seed) not in self.cache]
+        tasks = list(dict.fromkeys(tasks))
+        if self.pool is not None and len(tasks) > 1:
+            results = self.pool.map(_evaluate, tasks, chunksize=max(1, len(tasks) // (4 * self.workers)))
+        else:
+            results = map(_evaluate, tasks)
+        for task, kpis in zip(tasks, results):
+            self.cache[task] = kpis
+        return {config: [self.cache[(scenario, config, seed)] for seed in seeds] for config in configs}
+
+    def mean_kpis(self, scenario: str, config: Config) -> Dict[str, float]:
+        runs = self.evaluate(scenario, [config], self.seeds)[config]
+        return {kpi: float(np.mean([run[kpi] for run in runs])) for kpi in runs[0]}
+
+    def _is_feasible(self, scenario: str, config: Config) -> bool:
+        return self.feasible(self.mean_kpis(scenario, config))
+
+    def _best_step(self, scenario: str, current: Config) -> Config:
+        """
+        The +1 rider neighbour of current with the largest shortfall reduction per rider-hour.
+        Seeds are run in rounds; after each round, candidates whose paired gain is more than
+        EARLY_STOP_SE standard errors below the leader's are no longer simulated.
+        """
+        candidates = []
+        for b, (block, riders) in enumerate(current):
+            candidate = list(current)
+            candidate[b] = (block, riders + 1)
+            candidates.append((tuple(candidate), self.block_hours[block]))
+        base = [self.shortfall(k) for k in self.evaluate(scenario, [current], self.seeds)[current]]
+        gains = {config: [] for config, _ in candidates}
+        alive = [config for config, _ in candidates]
+        hours = dict(candidates)
+        round_size = ROUND_SEEDS
+        for start in range(0, len(self.seeds), round_size):
+            seeds = self.seeds[start:start + round_size]
+            runs = self.evaluate(scenario, alive, seeds)
+            for config in alive:
+                gains[config].extend((base[start + i] - self.shortfall(k)) / hours[config]
+                                     for i, k in enumerate(runs[config]))
+            if len(alive) == 1 or start + round_size >= len(self.seeds):
+                continue
+            n = len(gains[alive[0]])
+            means = {c: float(np.mean(gains[c])) for c in alive}
+            errors = {c: float(np.std(gains[c], ddof=1)) / math.sqrt(n) for c in alive}
+            leader = max(alive, key=lambda c: (means[c], -self.cost(c)))
+            alive = [c for c in alive
+                     if c == leader or means[c] + EARLY_STOP_SE * errors[c] >= means[leader] - EARLY_STOP_SE * errors[leader]]
+        return max(alive, key=lambda c: (float(np.mean(gains[c])), -hours[c]))
+
+    def optimize_scenario(self, scenario: str) -> Dict:
+        """
+        Cheapest configuration found for one scenario, with its mean KPIs over the seeds.
+        """
+        current = self.lower_bound(scenario)
+        iterations = 0
+        while not self._is_feasible(scenario, current) and iterations < self.max_iterations:
+            current = self._best_step(scenario, current)
+            iterations += 1
+        # Pruning: drop riders from the most expensive blocks as long as the target still holds
+        improved = self._is_feasible(scenario, current)
+        while improved:
+            improved = False
+            for b in sorted(range(len(current)), key=lambda b: -self.block_hours[current[b][0]]):
+                block, riders = current[b]
+                if riders <= self.min_riders:
+                    continue
+                candidate = current[:b] + ((block, riders - 1),) + current[b + 1:]
+                if self._is_feasible(scenario, candidate):
+                    current, improved = candidate, True
+                    break
+        return {
+            "riders": dict(current),
+            "rider_hours": self.cost(current),
+            "feasible": self._is_feasible(scenario, current),
+            "kpis": self.mean_kpis(scenario, current),
+            "iterations": iterations,
+            "simulations": sum(1 for key in self.cache if key[0] == scenario),
+        }
+
+    def optimize(self, scenarios: List[str] = None) -> Dict[str, Dict]:
+        """
+        Optimize every scenario (all of the demand file's scenarios by default).
+        """
+        scenarios = scenarios if scenarios is not None else self.sim.scenarios
+        initargs = (self.demand_json_path, self.timeout_min, self.cancel_prob, self.dispatch)
+        _init_worker(*initargs)
+        if self.workers > 1:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=initargs)
+        try:
+            return {s: self.optimize_scenario(s) for s in scenarios}
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+                self.pool = None
+
+    def print_plan(self, plan: Dict[str, Dict]):
+        target = f"success rate >= {self.target_success * 100:.0f}%"
+        if self.target_p90_wait is not None:
+            target += f", p90 wait <= {self.target_p90_wait:g} min"
+        print(f"\n=== Fleet plan ({target}, {len(self.seeds)} seeds) ===")
+        for s, result in plan.items():
+            k = result["kpis"]
+            status = "" if result["feasible"] else " (target not met)"
+            print(f"\nScenario: {s.title()}{status}")
+            for block, riders in result["riders"].items():
+                print(f"  {block}: {riders} riders")
+            print(f"  Rider-hours: {result['rider_hours']:.1f}")
+            print(f"  Success rate: {k['success_rate'] * 100:.2f}%, p90 wait: {k['p90_wait']:.2f} min, "
+                  f"profit: {k['profit']:.2f} EUR")
+            print(f"  Simulated days: {result['simulations']}")
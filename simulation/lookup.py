@@ -0,0 +1,42 @@
+import numpy as np
+from typing import Dict, List
+from .vehicle import Vehicle
+
+# Traffic levels are integers on a 0-100 scale
+MAX_TRAFFIC_LEVEL = 100
+
+
+class VehicleTable:
+    """
+    Precomputed speed and emission factors of one vehicle type, indexed by (traffic_level, weather).
+    Built once by evaluating Vehicle.get_speed and the weather effects, so lookups reproduce the
+    formulas without branching or repeated multiplication.
+    """
+
+    def __init__(self, vehicle: Vehicle, weather_types: List[str], weather_effects: Dict[str, Dict[str, float]]):
+        speed_factors = np.array([weather_effects[w]["speed_factor"] for w in weather_types])
+        emission_factors = np.array([weather_effects[w]["emission_factor"] for w in weather_types])
+        base_speed = np.array([vehicle.get_speed(t) for t in range(MAX_TRAFFIC_LEVEL + 1)], dtype=float)
+        # speed[traffic_level, weather] in km/h
+        self.speed = base_speed[:, None] * speed_factors[None, :]
+        # operational g CO2 per km per weather
+        self.emissions_per_km = vehicle.emissions_per_km * emission_factors
+        # Nested lists for the scalar path (Trip), where NumPy element access would be slower than the formula
+        self.speed_rows = self.speed.tolist()
+        self.emissions_per_km_list = self.emissions_per_km.tolist()
+
+
+def compile_vehicle_tables(vehicles: List[Vehicle], weather_types: List[str],
+                           weather_effects: Dict[str, Dict[str, float]]) -> Dict[str, VehicleTable]:
+    """
+    One VehicleTable per vehicle type, keyed by vehicle name.
+    """
+    return {v.name: VehicleTable(v, weather_types, weather_effects) for v in vehicles}
+
+
+def stack_tables(tables: List[VehicleTable]):
+    """
+    Stack per-vehicle tables for the batch path: speed[vehicle, traffic_level, weather]
+    and emissions_per_km[vehicle, weather].
+    """
+    return np.stack([t.speed for t in tables]), np.stack([t.emissions_per_km for t in tables])
@@ -0,0 +1,47 @@
+import csv
+from typing import Iterable, List
+from .results import TripResults
+
+
+class CsvResultWriter:
+    """
+    Incremental CSV writer: the header is written with the first chunk and every chunk
+    is appended as it arrives, so output reaches disk while the simulation is still running.
+    """
+
+    def __init__(self, filename: str = "simulation_results.csv"):
+        self.filename = filename
+        self.rows_written = 0
+        self._file = None
+        self._writer = None
+
+    def update(self, chunk: TripResults):
+        if self._writer is None:
+            self._file = open(self.filename, mode="w", newline='', encoding="utf-8")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(chunk.keys())
+        keys = chunk.keys()
+        columns = [chunk.labels(k) if k in chunk.categories else chunk.columns[k].tolist() for k in keys]
+        self._writer.writerows(zip(*columns))
+        self.rows_written += len(chunk)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def run_pipeline(chunks: Iterable[TripResults], sinks: List) -> List:
+    """
+    Feed each result chunk to every sink (anything with an update(chunk) method, e.g. TripSummary
+    or CsvResultWriter), dropping the chunk afterwards. Sinks with a close() method are closed at the end.
+    """
+    try:
+        for chunk in chunks:
+            for sink in sinks:
+                sink.update(chunk)
+    finally:
+        for sink in sinks:
+            if hasattr(sink, "close"):
+                sink.close()
+    return sinks
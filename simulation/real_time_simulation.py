@@ -1,23 +1,84 @@
 import json
+import math
 import time
+import heapq
 import random
 import logging
-from collections import deque, defaultdict
+import numpy as np
+from collections import deque
 from typing import Dict, List
 from .city import City
-from .trip import Trip
-import matplotlib.pyplot as plt
+from .batch import BatchEngine
+from .arrivals import ArrivalStream, generate_arrival_stream
+from .riders import RiderPool, shifts_from_riders_per_minute, shifts_from_spec
+from .timeline import DemandTimeline
+from .spatial import PlaceCoordinates, SpatialRiderPool
+from .vehicle import FatBike
+from .aggregators import BufferedStats
+from .trace import EventTrace, REQUEST, ASSIGN, COMPLETE, CANCEL as TRACE_CANCEL
 
-TIME_BLOCKS = [
-    ("morning_peak", "07:00", "09:30"),
-    ("midday_offpeak", "9:30", "15:30"),
-    ("evening_peak", "15:30", "18:30"),
-    ("evening_offpeak", "18:30", "22:00"),
-    ("night", "22:00", "7:00")
-]
+# Event kinds, in the order they are applied when they share a timestamp
+# (arrivals are read from the pre-built arrival array between RIDER_FREE and CANCEL)
+DAY_START, BLOCK_START, SHIFT_END, SHIFT_START, RIDER_FREE, CANCEL = 0, 1, 2, 3, 4, 5
+
+# Fare of a serviced ride: fixed part plus a per-km part (EUR)
+FIXED_FARE = 1.5
+FARE_PER_KM = 0.2
+
+# Range and resolution of the wait-time histogram (minutes); longer waits count as overflow
+MAX_WAIT_MIN = 120.0
+WAIT_BINS = 480
+
+# Nearest-rider dispatch: riders ride to the pickup at fat bike speed, with road distance taken as
+# the straight-line distance times a typical urban detour factor
+PICKUP_DETOUR_FACTOR = 1.3
+
+# Simulated seconds per wall-clock second of the original demo (1 second = 1 simulated hour)
+DEMO_TIME_SCALE = 3600
+
+
+class Pacer:
+    """
+    Keeps simulated time in step with the wall clock at a fixed ratio (simulated seconds per
+    wall-clock second) and records how far the wall clock runs behind or ahead of that target.
+    """
+
+    def __init__(self, time_scale: float):
+        if time_scale <= 0:
+            raise ValueError("time_scale must be positive")
+        self.time_scale = time_scale
+        self.start = time.perf_counter()
+        self.max_lag = 0.0
+
+    def lag(self, sim_minute: float) -> float:
+        """
+        Seconds the wall clock is behind the target for sim_minute (negative when ahead).
+        """
+        return time.perf_counter() - self.start - sim_minute * 60 / self.time_scale
+
+    def wait(self, sim_minute: float):
+        lag = self.lag(sim_minute)
+        if lag < 0:
+            time.sleep(-lag)
+        elif lag > self.max_lag:
+            self.max_lag = lag
+
+
+def _resolve_time_scale(time_scale):
+    """
+    None or "fast" runs unthrottled, "realtime" is 1:1, a number is simulated seconds per wall-clock second.
+    """
+    if time_scale is None or time_scale == "fast":
+        return None
+    if time_scale == "realtime":
+        return 1.0
+    if isinstance(time_scale, str):
+        raise ValueError(f"Unknown time_scale: {time_scale}")
+    return float(time_scale)
 
 class RealTimeSimulation:
-    def __init__(self, demand_json_path: str = "data/daily_demand.json", seed: int = 42, timeout_min: int = 5, cancel_prob: float = 0.8):
+    def __init__(self, demand_json_path: str = "data/daily_demand.json", seed: int = 42, timeout_min: int = 5, cancel_prob: float = 0.8,
+                 slots_per_minute: int = 1, scenarios: List[str] = None, riders: Dict[str, int] = None):
         # Set up logging
         logging.basicConfig(
             level=logging.INFO,
@@ -29,110 +90,469 @@ class RealTimeSimulation:
         self.timeout_min = timeout_min
         self.cancel_prob = cancel_prob
         with open(demand_json_path, "r") as f:
-            self.demand = json.load(f)["time_blocks"]
+            demand = json.load(f)
+        self.demand = demand["time_blocks"]
+        # Demand per type of day; weekends fall back to the weekday blocks
+        self.profiles = {"weekday": self.demand, "weekend": demand.get("weekend_time_blocks", self.demand)}
         self.day_minutes = 24 * 60
-        self.scenarios = ["optimistic", "moderate", "pessimistic"]
-        self.stats = {s: {"wait_times": [], "serviced": 0, "unsuccessful": 0, "total": 0} for s in self.scenarios}
-        self.queues = {s: deque() for s in self.scenarios}
-        self.riders_available = {block: self.demand[block]["riders"] for block in self.demand}
-        random.seed(seed)
+        self.scenarios = list(scenarios) if scenarios is not None else ["optimistic", "moderate", "pessimistic"]
+        # Profiles compiled into slot-indexed timelines; an optional "demand_curve" (or
+        # "weekend_demand_curve") replaces the flat per-block arrival rates
+        curves = {"weekday": demand.get("demand_curve"),
+                  "weekend": demand.get("weekend_demand_curve",
+                                        None if "weekend_time_blocks" in demand else demand.get("demand_curve"))}
+        self.timelines = {day_type: DemandTimeline.from_blocks(blocks, self.scenarios, slots_per_minute, curves[day_type])
+                          for day_type, blocks in self.profiles.items()}
+        self.stats = self._new_stats()
+        # Rider shifts per type of day: listed explicitly under "shifts" / "weekend_shifts", or derived
+        # from the riders per time block
+        self.profile_shifts = {}
+        for day_type, timeline in self.timelines.items():
+            spec = demand.get("weekend_shifts" if day_type == "weekend" else "shifts", demand.get("shifts"))
+            if spec is not None:
+                self.profile_shifts[day_type] = shifts_from_spec(spec, self.day_minutes)
+            else:
+                self.profile_shifts[day_type] = shifts_from_riders_per_minute(timeline.riders_per_minute())
+        self._update_fleet()
+        if riders is not None:
+            self.set_riders(riders)
+        self.engine = BatchEngine(self.city)
+        self.trace = None
+        self.reseed(seed)
         self.logger.info("Initialized RealTimeSimulation with scenarios: %s", self.scenarios)
 
-    def get_time_block(self, minute: int):
+    def _update_fleet(self):
+        self.shifts = self.profile_shifts["weekday"]
+        self.fleet_size = max((rider for shifts in self.profile_shifts.values() for rider, _, _ in shifts),
+                              default=-1) + 1
+
+    def set_riders(self, riders: Dict[str, int], day_type: str = None):
+        """
+        Override the number of riders per time block (for one type of day, or all of them) and
+        derive the shifts from it, replacing any shifts from the demand file.
+        """
+        day_types = [day_type] if day_type is not None else list(self.timelines)
+        for dt in day_types:
+            unknown = set(riders) - set(self.timelines[dt].block_names)
+            if unknown:
+                raise ValueError(f"Unknown time blocks for {dt}: {', '.join(sorted(unknown))}")
+        for dt in day_types:
+            timeline = self.timelines[dt]
+            timeline.set_block_riders({**{b: int(r) for b, r in zip(timeline.block_names, timeline.block_riders)},
+                                       **riders})
+            self.profile_shifts[dt] = shifts_from_riders_per_minute(timeline.riders_per_minute())
+        self._update_fleet()
+
+    def get_time_block(self, minute: int, day_type: str = "weekday") -> str:
         # Returns block name for a given minute of the day
-        h = (minute // 60) % 24
-        m = minute % 60
-        t = f"{h:02d}:{m:02d}"
-        for block, info in self.demand.items():
-            start = info["start"]
-            end = info["end"]
-            if start < end:
-                if start <= t < end:
-                    return block
-            else:  # overnight
-                if t >= start or t < end:
-                    return block
-        return "night"
-
-    def run(self, verbose=False):
-        self.logger.info("Starting real-time simulation for a full day (%d minutes)", self.day_minutes)
-        available_riders = {s: {block: self.riders_available[block] for block in self.demand} for s in self.scenarios}
+        return self.timelines[day_type].block_at(minute)
+
+    def reseed(self, seed: int):
+        """
+        Restart the random streams, e.g. to simulate another independent day.
+        """
+        random.seed(seed)
+        self.rng = np.random.default_rng(seed)
+
+    def place_coordinates(self) -> PlaceCoordinates:
+        """
+        Planar coordinates of the City's places, loaded on first use.
+        """
+        if getattr(self, "_place_coordinates", None) is None:
+            self._place_coordinates = PlaceCoordinates(self.city.places)
+        return self._place_coordinates
+
+    @staticmethod
+    def day_type(day: int, start_weekday: int = 0) -> str:
+        """
+        "weekday" or "weekend" for a day of the run (start_weekday: 0 = Monday ... 6 = Sunday).
+        """
+        return "weekend" if (start_weekday + day) % 7 >= 5 else "weekday"
+
+    def arrival_rates(self, scenario: str, day_type: str = "weekday") -> np.ndarray:
+        """
+        Expected requests per minute in every timeline slot of the day.
+        """
+        return self.timelines[day_type].rates[scenario]
+
+    def generate_arrivals(self, day_type: str = "weekday") -> Dict[str, ArrivalStream]:
+        """
+        Draw the day's request stream per scenario up front as a non-homogeneous Poisson process,
+        with OD pairs, ride durations and patience sampled for all requests at once.
+        Patience is the number of extra minutes a customer keeps waiting after the timeout: from
+        then on they cancel with probability cancel_prob each minute.
+        Both engines consume the same stream, so they can be compared for the same seed.
+        """
+        slot_minutes = self.timelines[day_type].slot_minutes
+        return {s: generate_arrival_stream(self.engine, self.arrival_rates(s, day_type), self.rng, self.cancel_prob,
+                                           slot_minutes=slot_minutes)
+                for s in self.scenarios}
+
+    def run(self, verbose=False, engine: str = "events", ticks_per_minute: int = 1, arrivals=None, time_scale=None,
+            trace: EventTrace = None, days: int = 1, start_weekday: int = 0, dispatch: str = "fifo"):
+        """
+        Simulate one or more consecutive days for every scenario.
+        verbose: print a line for every serviced ride
+        engine: "events" (discrete-event core) or "minute" (reference minute-stepped loop, single day)
+        ticks_per_minute: clock resolution of the event engine (e.g. 60 for seconds)
+        arrivals: request stream from generate_arrivals() for a single day; drawn day by day when omitted
+        time_scale: None/"fast" (as fast as possible), "realtime", or simulated seconds per
+            wall-clock second (DEMO_TIME_SCALE = 1 second per simulated hour)
+        trace: EventTrace to record request/assign/complete/cancel events into (events engine only)
+        days: number of days; queues and riders carry over midnight, and weekend days use the
+            weekend profile (start_weekday: 0 = Monday ... 6 = Sunday)
+        dispatch: "fifo" (longest-free rider, no pickup travel) or "nearest" (closest free rider
+            by position, pickup time counts towards the wait; events engine only)
+        """
+        if dispatch not in ("fifo", "nearest"):
+            raise ValueError(f"Unknown dispatch: {dispatch}")
+        if days < 1:
+            raise ValueError("days must be at least 1")
+        if arrivals is not None and days > 1:
+            raise ValueError("Pre-built arrivals cover a single day")
+        self.logger.info("Starting real-time simulation for %d day(s) (%d minutes)", days, days * self.day_minutes)
+        scale = _resolve_time_scale(time_scale)
+        pacer = Pacer(scale) if scale is not None else None
+        wall_start = time.perf_counter()
+        self.trace = trace
+        if engine == "events":
+            stats = self._run_events(arrivals, ticks_per_minute, pacer, verbose, trace, days, start_weekday, dispatch)
+        elif engine == "minute":
+            if days > 1 or dispatch != "fifo":
+                raise ValueError("The minute-stepped engine simulates a single day with FIFO dispatch")
+            if arrivals is None:
+                arrivals = self.generate_arrivals(self.day_type(0, start_weekday))
+            stats = self._run_minute_stepped(arrivals, pacer, verbose, self.day_type(0, start_weekday))
+        else:
+            raise ValueError(f"Unknown engine: {engine}")
+        wall = time.perf_counter() - wall_start
+        sim_seconds = days * self.day_minutes * 60
+        self.pacing = {
+            "time_scale": scale,
+            "wall_seconds": wall,
+            "achieved_time_scale": sim_seconds / wall if wall > 0 else math.inf,
+            "target_seconds": sim_seconds / scale if scale is not None else 0.0,
+            "max_lag_seconds": pacer.max_lag if pacer is not None else 0.0,
+        }
+        self.days = days
+        self.stats = stats
+        self.logger.info("Simulation complete in %.2f s wall time (%.0fx real time).",
+                         wall, self.pacing["achieved_time_scale"])
+        if pacer is not None:
+            self.logger.info("Pacing at %gx: finished %.3f s %s target, max lag %.3f s",
+                             scale, abs(wall - self.pacing["target_seconds"]),
+                             "behind" if wall > self.pacing["target_seconds"] else "ahead of", pacer.max_lag)
+        return stats
+
+    def _log_clock(self, minute: int, pacer):
+        day, minute_of_day = divmod(minute, self.day_minutes)
+        clock = f"{minute_of_day // 60:02d}:{minute_of_day % 60:02d}"
+        if day > 0:
+            clock = f"day {day + 1} {clock}"
+        if pacer is None:
+            self.logger.info(f"Simulated time: {clock} (minute {minute})")
+        else:
+            lag = pacer.lag(minute)
+            self.logger.info(f"Simulated time: {clock} (minute {minute}), "
+                             f"wall clock {abs(lag):.3f} s {'behind' if lag > 0 else 'ahead of'} target")
+
+    def _new_stats(self):
+        """
+        Streaming per-scenario accumulators: counts, wait-time statistics and histogram, and
+        running revenue sums, so memory does not grow with the number of rides.
+        """
+        return {s: {"serviced": 0, "unsuccessful": 0, "total": 0,
+                    "wait": BufferedStats(0.0, MAX_WAIT_MIN, WAIT_BINS),
+                    "profit": 0.0, "distance_km": 0.0} for s in self.scenarios}
+
+    @staticmethod
+    def _record_ride(stats: Dict, wait: float, distance_km: float):
+        stats["serviced"] += 1
+        stats["wait"].add(wait)
+        stats["distance_km"] += distance_km
+        stats["profit"] += FIXED_FARE + FARE_PER_KM * distance_km
+
+    def _day_schedule(self, day: int, day_type: str, tpm: int):
+        """
+        Block-start and shift events of one day, as (tick, kind, payload).
+        """
+        offset = day * self.day_minutes
+        schedule = [(int(round((offset + minute) * tpm)), BLOCK_START, block)
+                    for minute, block in self.timelines[day_type].block_changes()]
+        for rider, start, end in self.profile_shifts[day_type]:
+            schedule.append(((offset + start) * tpm, SHIFT_START, rider))
+            schedule.append(((offset + end) * tpm, SHIFT_END, rider))
+        return schedule
+
+    def _run_events(self, arrivals: Dict[str, ArrivalStream] = None, ticks_per_minute: int = 1, pacer: Pacer = None,
+                    verbose: bool = False, trace: EventTrace = None, days: int = 1, start_weekday: int = 0,
+                    dispatch: str = "fifo"):
+        """
+        Discrete-event core: a heap of timestamped events (day start, time-block start, shift change,
+        rider freed, patience timeout) and the pre-built, time-sorted arrival array of the current
+        day drive the clock, which jumps straight from one event time to the next. All events at the
+        same time are applied before riders are dispatched, and timeouts are only checked after
+        dispatching, matching the order of the minute-stepped loop.
+        Each day's arrivals and schedule are loaded at its start, so memory does not grow with the
+        number of days; queues and riders simply carry on across midnight.
+        Times are integer ticks of 1 / ticks_per_minute minutes. With a pacer the loop waits for
+        the wall clock to reach each event time before applying it.
+        With nearest dispatch the request at the head of the queue gets the closest free rider,
+        who first rides to the pickup; riders stay where their last ride ended. A request whose
+        closest free rider cannot reach it before its cancel deadline stays queued (and times out
+        unless a closer rider frees up), while the rider goes on to the next request.
+        """
+        stats = self._new_stats()
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        tpm = ticks_per_minute
+        day_ticks = self.day_minutes * tpm
+        horizon = days * day_ticks
+        events = [(0, DAY_START, 0, None, 0)]
+        seq = 1
+        num_scenarios = len(self.scenarios)
+        # Request ids are numbered per scenario over the whole run
+        request_base = [0] * num_scenarios
+
+        arrival_ticks, arrival_scenario, arrival_index = [], [], []
+        streams, duration_min, distance_km, cancel_after = [], [], [], []
+        next_arrival = 0
+        num_arrivals = 0
+
+        queues = [deque() for _ in self.scenarios]
+        nearest = dispatch == "nearest"
+        if nearest:
+            coords = self.place_coordinates()
+            # Riders start spread round-robin over the places
+            home = [r % len(coords.x) for r in range(self.fleet_size)]
+            pools = [SpatialRiderPool(self.fleet_size, [coords.x[h] for h in home], [coords.y[h] for h in home])
+                     for _ in self.scenarios]
+            pickup_min_per_km = PICKUP_DETOUR_FACTOR * 60 / FatBike.shared().speed_kmh
+        else:
+            pools = [RiderPool(self.fleet_size) for _ in self.scenarios]
+        block = None
+        next_log = 0
+        while events or next_arrival < num_arrivals:
+            now = min(events[0][0] if events else horizon,
+                      arrival_ticks[next_arrival] if next_arrival < num_arrivals else horizon)
+            if now >= horizon:
+                break
+            if pacer is not None:
+                pacer.wait(now / tpm)
+            # Apply every state change at this time
+            while events and events[0][0] == now and events[0][1] < CANCEL:
+                _, kind, _, si, data = heapq.heappop(events)
+                if kind == DAY_START:
+                    day_type = self.day_type(data, start_weekday)
+                    for tick, schedule_kind, payload in self._day_schedule(data, day_type, tpm):
+                        heapq.heappush(events, (tick, schedule_kind, seq, None, payload))
+                        seq += 1
+                    if data + 1 < days:
+                        heapq.heappush(events, (now + day_ticks, DAY_START, seq, None, data + 1))
+                        seq += 1
+                    # Load the day's arrivals, merged over scenarios into one time-ordered array
+                    # (stable, so each scenario keeps its own order)
+                    day_arrivals = arrivals if arrivals is not None else self.generate_arrivals(day_type)
+                    for si in range(num_scenarios):
+                        request_base[si] += len(streams[si]) if streams else 0
+                    streams = [day_arrivals[s] for s in self.scenarios]
+                    ticks = np.concatenate([now + stream.ticks(tpm) for stream in streams])
+                    scenario_of = np.concatenate([np.full(len(stream), si) for si, stream in enumerate(streams)])
+                    index_of = np.concatenate([np.arange(len(stream)) for stream in streams])
+                    order = np.argsort(ticks, kind="stable")
+                    arrival_ticks = ticks[order].tolist()
+                    arrival_scenario = scenario_of[order].tolist()
+                    arrival_index = index_of[order].tolist()
+                    duration_min = [stream.duration_min.tolist() for stream in streams]
+                    origins = [stream.origin.tolist() for stream in streams]
+                    destinations = [stream.destination.tolist() for stream in streams]
+                    distance_km = [stream.distance_km.tolist() for stream in streams]
+                    cancel_after = [np.rint((self.timeout_min + stream.patience) * tpm).tolist() for stream in streams]
+                    next_arrival = 0
+                    num_arrivals = len(arrival_ticks)
+                elif kind == BLOCK_START:
+                    block = data
+                elif kind == SHIFT_START:
+                    for pool in pools:
+                        pool.start_shift(data, now)
+                elif kind == SHIFT_END:
+                    for pool in pools:
+                        pool.end_shift(data, now)
+                elif trace is not None:
+                    # RIDER_FREE: the pool already knows, the event only wakes up the dispatcher
+                    trace.record(now / tpm, COMPLETE, si, data[1], data[0])
+            while next_arrival < num_arrivals and arrival_ticks[next_arrival] == now:
+                si, i = arrival_scenario[next_arrival], arrival_index[next_arrival]
+                next_arrival += 1
+                s = self.scenarios[si]
+                # request tick, request id, done flag, ride duration (min), distance, origin, destination,
+                # stream, index, cancel tick
+                deadline = now + int(cancel_after[si][i]) if cancel_after[si][i] != math.inf else math.inf
+                request = [now, request_base[si] + i, False, duration_min[si][i], distance_km[si][i],
+                           origins[si][i], destinations[si][i], streams[si], i, deadline]
+                queues[si].append(request)
+                stats[s]["total"] += 1
+                if trace is not None:
+                    trace.record(now / tpm, REQUEST, si, request[1])
+                if debug:
+                    self.logger.debug(f"[{s}] Trip requested at min {now / tpm:g} in block {block}")
+                if deadline != math.inf:
+                    heapq.heappush(events, (deadline, CANCEL, seq, si, request))
+                    seq += 1
+            # Dispatch free riders to waiting requests, longest-waiting request first
+            for si, s in enumerate(self.scenarios):
+                queue, pool = queues[si], pools[si]
+                # Requests no free rider can reach before the customer gives up; they stay queued
+                unreachable = []
+                while queue:
+                    if queue[0][2]:
+                        queue.popleft()
+                        continue
+                    if nearest:
+                        origin = queue[0][5]
+                        found = pool.acquire_nearest(now, coords.x[origin], coords.y[origin])
+                        if found is None:
+                            break
+                        rider, pickup_km = found
+                        pickup_ticks = int(round(pickup_km * pickup_min_per_km * tpm))
+                        if now + pickup_ticks > queue[0][9]:
+                            # Even the closest free rider arrives after the cancel deadline: put the
+                            # rider back and try the next request
+                            pool.release(rider, now)
+                            unreachable.append(queue.popleft())
+                            continue
+                    else:
+                        rider = pool.acquire(now)
+                        if rider is None:
+                            break
+                        pickup_ticks = 0
+                    request = queue.popleft()
+                    request[2] = True
+                    req_tick, request_id, _, ride_duration_min, ride_km, origin, destination, stream, i, _ = request
+                    wait = (now + pickup_ticks - req_tick) / tpm
+                    self._record_ride(stats[s], wait, ride_km)
+                    free_at = max(now + pickup_ticks + ride_duration_min * tpm, now + 1)
+                    if nearest:
+                        pool.release(rider, free_at, coords.x[destination], coords.y[destination])
+                    else:
+                        pool.release(rider, free_at)
+                    heapq.heappush(events, (free_at, RIDER_FREE, seq, si, (rider, request_id)))
+                    seq += 1
+                    if trace is not None:
+                        trace.record(now / tpm, ASSIGN, si, request_id, rider, wait)
+                    if debug:
+                        self.logger.debug(f"[{s}] Trip serviced after {wait:g} min wait at min {now / tpm:g}, ride duration {ride_duration_min} min")
+                    if verbose:
+                        minute = (now // tpm) % self.day_minutes
+                        print(f"[SUCCESS] Scenario: {s}, Time: {minute//60:02d}:{minute%60:02d}, Wait: {wait:g} min, Duration: {ride_duration_min} min, Origin: {stream.places[stream.origin[i]]}, Destination: {stream.places[stream.destination[i]]}")
+                queue.extendleft(reversed(unreachable))
+            # Patience timeouts of requests that are still waiting
+            while events and events[0][0] == now:
+                _, _, _, si, request = heapq.heappop(events)
+                if not request[2]:
+                    request[2] = True
+                    stats[self.scenarios[si]]["unsuccessful"] += 1
+                    if trace is not None:
+                        trace.record(now / tpm, TRACE_CANCEL, si, request[1], -1, (now - request[0]) / tpm)
+                    if debug:
+                        self.logger.debug(f"[{self.scenarios[si]}] Trip cancelled after waiting {(now - request[0]) / tpm:g} min at min {now / tpm:g}")
+            # Log timestamp every simulated hour
+            if now >= next_log:
+                minute = now // tpm
+                self._log_clock(minute, pacer)
+                next_log = (minute // 60 + 1) * 60 * tpm
+        # At the end of the horizon, cancel all remaining queued trips
+        for si, s in enumerate(self.scenarios):
+            for request in queues[si]:
+                if not request[2]:
+                    stats[s]["unsuccessful"] += 1
+                    if trace is not None:
+                        trace.record(horizon / tpm, TRACE_CANCEL, si, request[1], -1, (horizon - request[0]) / tpm)
+                    if debug:
+                        self.logger.debug(f"[{s}] Trip cancelled at end of run (queued at min {request[0] / tpm:g})")
+        return stats
+
+    def _run_minute_stepped(self, arrivals: Dict[str, ArrivalStream], pacer: Pacer = None, verbose: bool = False,
+                            day_type: str = "weekday"):
+        """
+        Reference engine: visits every minute of a single day and rescans each scenario's queue.
+        """
+        stats = self._new_stats()
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        timeline = self.timelines[day_type]
         queues = {s: deque() for s in self.scenarios}
-        stats = {s: {"wait_times": [], "serviced": 0, "unsuccessful": 0, "total": 0} for s in self.scenarios}
-        trip_probs = {s: {} for s in self.scenarios}
-        self.serviced_rides = {s: [] for s in self.scenarios}
-        for block, info in self.demand.items():
-            for s in self.scenarios:
-                trip_probs[s][block] = info[s] / info["minutes"]
+        pools = {s: RiderPool(self.fleet_size) for s in self.scenarios}
+        shift_changes = {}
+        for rider, start, end in self.profile_shifts[day_type]:
+            shift_changes.setdefault(start, []).append((rider, True))
+            shift_changes.setdefault(end, []).append((rider, False))
+        request_minutes = {s: arrivals[s].ticks().tolist() for s in self.scenarios}
+        next_arrival = {s: 0 for s in self.scenarios}
         # Simulate each minute for 24 hours (0 to 1439)
-        last_logged_second = -1
         for minute in range(self.day_minutes):
-            block = self.get_time_block(minute)
+            block = timeline.block_at(minute)
+            for rider, starts in sorted(shift_changes.get(minute, []), key=lambda change: change[1]):
+                for pool in pools.values():
+                    if starts:
+                        pool.start_shift(rider, minute)
+                    else:
+                        pool.end_shift(rider, minute)
             for s in self.scenarios:
-                # Generate trip request?
-                if random.random() < trip_probs[s][block]:
-                    trip = self.city.generate_fatbike_taxi_trip()
-                    queues[s].append((minute, trip))
+                stream = arrivals[s]
+                # Enqueue trip requests made this minute
+                times = request_minutes[s]
+                while next_arrival[s] < len(times) and times[next_arrival[s]] <= minute:
+                    queues[s].append((times[next_arrival[s]], next_arrival[s]))
+                    next_arrival[s] += 1
                     stats[s]["total"] += 1
-                    self.logger.debug(f"[{s}] Trip requested at min {minute} in block {block}")
-                # Try to service queued trips
-                riders = available_riders[s][block]
-                serviced_now = 0
+                    if debug:
+                        self.logger.debug(f"[{s}] Trip requested at min {minute} in block {block}")
+                # Try to service queued trips with riders that are on shift and free
                 new_queue = deque()
-                # Only service as many trips as there are available riders, but account for ride duration
-                # Track when each rider will be free (list of end times)
-                if not hasattr(self, 'rider_busy_until'):
-                    self.rider_busy_until = {s: {block: [] for block in self.demand} for s in self.scenarios}
-                # Remove riders who are now free
-                self.rider_busy_until[s][block] = [t for t in self.rider_busy_until[s][block] if t > minute]
-                available_now = riders - len(self.rider_busy_until[s][block])
-                while queues[s] and serviced_now < available_now:
-                    req_minute, trip = queues[s].popleft()
+                while queues[s]:
+                    rider = pools[s].acquire(minute)
+                    if rider is None:
+                        break
+                    req_minute, i = queues[s].popleft()
                     wait = minute - req_minute
-                    stats[s]["wait_times"].append(wait)
-                    stats[s]["serviced"] += 1
-                    serviced_now += 1
-                    # Calculate ride duration in minutes
-                    ride_duration_min = int(round(trip.get_duration_hours() * 60))
-                    self.rider_busy_until[s][block].append(minute + ride_duration_min)
-                    # Store ride distance for profit calculation
-                    self.serviced_rides[s].append({"distance_km": trip.get_distance_km()})
-                    self.logger.debug(f"[{s}] Trip serviced after {wait} min wait at min {minute}, ride duration {ride_duration_min} min")
-                    print(f"[SUCCESS] Scenario: {s}, Time: {minute//60:02d}:{minute%60:02d}, Wait: {wait} min, Duration: {ride_duration_min} min, Origin: {trip.origin}, Destination: {trip.destination}")
-                # For remaining queued trips, check timeout (now 5 min)
+                    # Ride duration in minutes
+                    ride_duration_min = int(stream.duration_min[i])
+                    pools[s].release(rider, max(minute + ride_duration_min, minute + 1))
+                    self._record_ride(stats[s], wait, float(stream.distance_km[i]))
+                    if debug:
+                        self.logger.debug(f"[{s}] Trip serviced after {wait} min wait at min {minute}, ride duration {ride_duration_min} min")
+                    if verbose:
+                        print(f"[SUCCESS] Scenario: {s}, Time: {minute//60:02d}:{minute%60:02d}, Wait: {wait} min, Duration: {ride_duration_min} min, Origin: {stream.places[stream.origin[i]]}, Destination: {stream.places[stream.destination[i]]}")
+                # For remaining queued trips, cancel those whose patience ran out
                 while queues[s]:
-                    req_minute, trip = queues[s].popleft()
+                    req_minute, i = queues[s].popleft()
                     wait = minute - req_minute
-                    if wait >= 5:
-                        # Cancel with probability
-                        if random.random() < self.cancel_prob:
-                            stats[s]["unsuccessful"] += 1
+                    if wait >= self.timeout_min + stream.patience[i]:
+                        stats[s]["unsuccessful"] += 1
+                        if debug:
                             self.logger.debug(f"[{s}] Trip cancelled after waiting {wait} min at min {minute}")
-                        else:
-                            # Still waiting, requeue
-                            new_queue.append((req_minute, trip))
                     else:
-                        new_queue.append((req_minute, trip))
+                        new_queue.append((req_minute, i))
                 queues[s] = new_queue
-            # Log timestamp every second (every 60 minutes in simulation)
+            # Log timestamp every simulated hour
             if minute % 60 == 0 or minute == self.day_minutes - 1:
-                sim_hour = minute // 60
-                sim_minute = minute % 60
-                self.logger.info(f"Simulated time: {sim_hour:02d}:{sim_minute:02d} (minute {minute})")
-            time.sleep(1/60)  # 1 second = 1 hour in simulation (1/60 sec per simulated minute)
+                self._log_clock(minute, pacer)
+            if pacer is not None:
+                pacer.wait(minute + 1)
         # After last minute, cancel all remaining queued trips
         for s in self.scenarios:
-            for req_minute, trip in queues[s]:
+            for req_minute, i in queues[s]:
                 stats[s]["unsuccessful"] += 1
-                self.logger.debug(f"[{s}] Trip cancelled at end of day (queued at min {req_minute})")
-        self.stats = stats
-        self.logger.info("Simulation complete.")
+                if debug:
+                    self.logger.debug(f"[{s}] Trip cancelled at end of day (queued at min {req_minute})")
         return stats
 
-    def plot_success_pie(self):
+    def plot_success_pie(self, filename: str = None):
         """
-        Plot a pie chart for each scenario showing successful vs unsuccessful rides.
+        Plot a pie chart for each scenario showing successful vs unsuccessful rides
+        (saved to filename instead of shown when given).
         """
+        import matplotlib.pyplot as plt
+        from utils.plotting import show_or_save
         scenarios = self.scenarios
         fig, axs = plt.subplots(1, len(scenarios), figsize=(6 * len(scenarios), 5))
         if len(scenarios) == 1:
@@ -152,28 +572,48 @@ class RealTimeSimulation:
             axs[idx].set_title(f"{s.title()} Scenario")
         plt.suptitle("Ride Success Rate per Scenario")
         plt.tight_layout(rect=[0, 0.03, 1, 0.95])
-        plt.show()
+        show_or_save(fig, filename)
 
-    def print_results(self):
+    def kpis(self) -> Dict[str, Dict[str, float]]:
+        """
+        Key figures of the last run per scenario: request counts, success rate, wait times and profit.
+        """
+        kpis = {}
+        for s in self.scenarios:
+            stats = self.stats[s]
+            total = stats["total"]
+            serviced = stats["serviced"]
+            wait = stats["wait"].stats()
+            kpis[s] = {
+                "total": total,
+                "serviced": serviced,
+                "unsuccessful": stats["unsuccessful"],
+                "success_rate": serviced / total if total > 0 else 0.0,
+                "avg_wait": wait.mean if serviced > 0 else 0.0,
+                "p90_wait": stats["wait"].quantile(0.9) if serviced > 0 else 0.0,
+                "max_wait": wait.max if serviced > 0 else 0.0,
+                "profit": stats["profit"],
+                "distance_km": stats["distance_km"],
+            }
+        return kpis
+
+    def print_results(self, plot: bool = True, filename: str = None):
+        """
+        Print the KPIs per scenario and plot the success pie charts (shown, or saved to filename).
+        """
+        kpis = self.kpis()
         total_profit = 0.0
         for s in self.scenarios:
-            total = self.stats[s]["total"]
-            serviced = self.stats[s]["serviced"]
-            unsuccessful = self.stats[s]["unsuccessful"]
-            avg_wait = sum(self.stats[s]["wait_times"]) / serviced if serviced > 0 else 0
-            # Calculate profit for this scenario
-            profit = 0.0
-            if hasattr(self, "serviced_rides") and s in self.serviced_rides:
-                for ride in self.serviced_rides[s]:
-                    ride_profit = 1.5 + 0.2 * ride["distance_km"]
-                    profit += ride_profit
+            k = kpis[s]
+            total = k["total"]
             print(f"\nScenario: {s.title()}")
             print(f"  Total trip requests: {total}")
-            print(f"  Successful rides: {serviced} ({100*serviced/total:.1f}%)")
-            print(f"  Unsuccessful rides: {unsuccessful} ({100*unsuccessful/total:.1f}%)")
-            print(f"  Average wait time (min): {avg_wait:.2f}")
-            print(f"  Total profit: €{profit:.2f}")
-            total_profit += profit
+            print(f"  Successful rides: {k['serviced']} ({100*k['serviced']/total:.1f}%)")
+            print(f"  Unsuccessful rides: {k['unsuccessful']} ({100*k['unsuccessful']/total:.1f}%)")
+            print(f"  Average wait time (min): {k['avg_wait']:.2f}")
+            print(f"  Total profit: €{k['profit']:.2f}")
+            total_profit += k["profit"]
         print(f"\n=== TOTAL PROFIT (all scenarios): €{total_profit:.2f} ===")
         # Plot pie chart for each scenario
-        self.plot_success_pie()
+        if plot:
+            self.plot_success_pie(filename)
@@ -0,0 +1,107 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+from .real_time_simulation import RealTimeSimulation
+
+# Two-sided 95% Student t critical values by degrees of freedom; the normal value is used beyond 30
+T_CRITICAL_95 = {
+    1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262, 10: 2.228,
+    11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145, 15: 2.131, 16: 2.120, 17: 2.110, 18: 2.101, 19: 2.093,
+    20: 2.086, 21: 2.080, 22: 2.074, 23: 2.069, 24: 2.064, 25: 2.060, 26: 2.056, 27: 2.052, 28: 2.048,
+    29: 2.045, 30: 2.042,
+}
+PERCENTILES = (5, 50, 95)
+KPIS = ("success_rate", "avg_wait", "p90_wait", "max_wait", "profit", "total", "serviced")
+
+
+def replication_seeds(seed: int, n: int) -> List[int]:
+    """
+    Independent seeds for n replications, spawned from one SeedSequence so they do not
+    depend on how replications are spread over workers.
+    """
+    return [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(seed).spawn(n)]
+
+
+# Simulation held by each worker process of run_replications
+_worker_sim: RealTimeSimulation = None
+
+
+def _init_worker(demand_json_path: str, timeout_min: int, cancel_prob: float):
+    global _worker_sim
+    _worker_sim = RealTimeSimulation(demand_json_path, timeout_min=timeout_min, cancel_prob=cancel_prob)
+    _worker_sim.logger.setLevel("WARNING")
+
+
+def _run_replication(task) -> Dict[str, Dict[str, float]]:
+    seed, engine = task
+    _worker_sim.reseed(seed)
+    _worker_sim.run(engine=engine)
+    return _worker_sim.kpis()
+
+
+def run_replications(n: int, seed: int = 42, workers: int = 1, demand_json_path: str = "data/daily_demand.json",
+                     timeout_min: int = 5, cancel_prob: float = 0.8, engine: str = "events") -> "ReplicationResults":
+    """
+    Simulate n independent days, each with its own seed, spread over a process pool.
+    Every worker loads the city and demand data once and then reseeds per replication, so the
+    results for a given seed are the same for any number of workers.
+    """
+    tasks = [(rep_seed, engine) for rep_seed in replication_seeds(seed, n)]
+    initargs = (demand_json_path, timeout_min, cancel_prob)
+    if workers > 1 and n > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, n), initializer=_init_worker, initargs=initargs) as pool:
+            runs = list(pool.map(_run_replication, tasks, chunksize=max(1, n // (4 * workers))))
+    else:
+        _init_worker(*initargs)
+        runs = [_run_replication(task) for task in tasks]
+    return ReplicationResults(runs)
+
+
+class ReplicationResults:
+    """
+    KPIs of independent simulated days, summarized per scenario with means, percentiles
+    and 95% confidence intervals of the mean.
+    """
+
+    def __init__(self, runs: List[Dict[str, Dict[str, float]]]):
+        self.runs = runs
+        self.scenarios = list(runs[0]) if runs else []
+
+    def __len__(self) -> int:
+        return len(self.runs)
+
+    def values(self, scenario: str, kpi: str) -> np.ndarray:
+        return np.array([run[scenario][kpi] for run in self.runs], dtype=float)
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """
+        summary[scenario][kpi] with mean, std, ci_low/ci_high (95%) and p5/p50/p95.
+        """
+        n = len(self.runs)
+        t = T_CRITICAL_95.get(n - 1, 1.96)
+        summary = {}
+        for s in self.scenarios:
+            summary[s] = {}
+            for kpi in KPIS:
+                values = self.values(s, kpi)
+                mean = float(values.mean())
+                std = float(values.std(ddof=1)) if n > 1 else 0.0
+                half_width = t * std / np.sqrt(n) if n > 1 else float("nan")
+                stats = {"mean": mean, "std": std, "ci_low": mean - half_width, "ci_high": mean + half_width}
+                for p, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+                    stats[f"p{p}"] = float(value)
+                summary[s][kpi] = stats
+        return summary
+
+    def print_summary(self):
+        summary = self.summary()
+        print(f"\n=== {len(self.runs)} replications ===")
+        for s in self.scenarios:
+            print(f"\nScenario: {s.title()}")
+            for kpi, label, scale, unit in (("success_rate", "Success rate", 100, "%"),
+                                            ("avg_wait", "Average wait time", 1, " min"),
+                                            ("profit", "Profit", 1, " EUR")):
+                k = summary[s][kpi]
+                print(f"  {label}: {k['mean'] * scale:.2f}{unit} "
+                      f"(95% CI {k['ci_low'] * scale:.2f}-{k['ci_high'] * scale:.2f}, "
+                      f"p5-p95 {k['p5'] * scale:.2f}-{k['p95'] * scale:.2f})")
@@ -0,0 +1,142 @@
+import numpy as np
+from typing import Dict, Iterable, Iterator, List, Union
+
+# Trip.summary() fields in output order, with the dtype used to store them column-wise
+FIELDS = {
+    "vehicle": np.int8,
+    "origin": np.int16,
+    "destination": np.int16,
+    "distance_km": np.float64,
+    "traffic_level": np.int16,
+    "weather": np.int8,
+    "passengers": np.int16,
+    "speed_kmh": np.float64,
+    "duration_hr": np.float64,
+    "emissions_total_g": np.float64,
+    "emissions_per_passenger_g": np.float64,
+}
+# Fields stored as integer codes into a list of category labels
+CATEGORICAL = ("vehicle", "origin", "destination", "weather")
+
+
+class TripResults:
+    """
+    Columnar store of trip summaries: one typed NumPy array per Trip.summary() field,
+    with vehicle/weather/origin/destination kept as categorical codes.
+    Indexing and iteration yield the same dicts as Trip.summary() for backward compatibility.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], categories: Dict[str, List[str]]):
+        self.columns = {name: np.asarray(columns[name], dtype=dtype) for name, dtype in FIELDS.items()}
+        self.categories = {name: list(categories[name]) for name in CATEGORICAL}
+        lengths = {len(col) for col in self.columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"Columns have different lengths: {sorted(lengths)}")
+
+    @classmethod
+    def from_dicts(cls, records: Iterable[Dict]) -> "TripResults":
+        """
+        Build a columnar store from a list of Trip.summary() dicts.
+        """
+        records = list(records)
+        categories = {name: {} for name in CATEGORICAL}
+        columns = {}
+        for name in FIELDS:
+            if name in categories:
+                index = categories[name]
+                columns[name] = [index.setdefault(r[name], len(index)) for r in records]
+            else:
+                columns[name] = [r[name] for r in records]
+        return cls(columns, {name: list(index) for name, index in categories.items()})
+
+    @classmethod
+    def coerce(cls, results: Union["TripResults", List[Dict]]) -> "TripResults":
+        """
+        Accept either a TripResults or the legacy list of dicts.
+        """
+        return results if isinstance(results, cls) else cls.from_dicts(results)
+
+    @classmethod
+    def concat(cls, parts: List["TripResults"]) -> "TripResults":
+        """
+        Concatenate several stores, remapping categorical codes when their labels differ.
+        """
+        if not parts:
+            return cls.from_dicts([])
+        categories = {}
+        columns = {}
+        for name in FIELDS:
+            if name in CATEGORICAL:
+                labels = list(parts[0].categories[name])
+                index = {label: i for i, label in enumerate(labels)}
+                codes = []
+                for part in parts:
+                    part_labels = part.categories[name]
+                    if part_labels == labels[:len(part_labels)]:
+                        codes.append(part.columns[name])
+                        continue
+                    remap = np.array([index.setdefault(label, len(index)) for label in part_labels], dtype=np.int64)
+                    labels = list(index)
+                    codes.append(remap[part.columns[name]] if len(part_labels) else part.columns[name])
+                categories[name] = labels
+                columns[name] = np.concatenate(codes)
+            else:
+                columns[name] = np.concatenate([part.columns[name] for part in parts])
+        return cls(columns, categories)
+
+    def __len__(self) -> int:
+        return len(self.columns["distance_km"])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return TripResults({name: col[index] for name, col in self.columns.items()}, self.categories)
+        row = {}
+        for name, col in self.columns.items():
+            value = col[index].item()
+            row[name] = self.categories[name][value] if name in self.categories else value
+        return row
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def keys(self) -> List[str]:
+        return list(FIELDS)
+
+    def present_codes(self, name: str) -> List[int]:
+        """
+        Codes of a categorical column that actually occur, in order of first appearance.
+        """
+        codes, first = np.unique(self.columns[name], return_index=True)
+        return [int(c) for c in codes[np.argsort(first)]]
+
+    def labels(self, name: str) -> np.ndarray:
+        """
+        Decoded values of a categorical column.
+        """
+        return np.asarray(self.categories[name], dtype=object)[self.columns[name]]
+
+    def to_dicts(self) -> List[Dict]:
+        """
+        Adapter to the legacy List[Dict] format returned by Simulation.run.
+        """
+        return list(self)
+
+    def to_numpy(self) -> Dict[str, np.ndarray]:
+        """
+        Zero-copy view of the underlying columns (categorical fields as integer codes).
+        """
+        return self.columns
+
+    def to_pandas(self):
+        """
+        DataFrame over the columns without copying numeric data; categorical fields become pandas Categoricals.
+        """
+        import pandas as pd
+        data = {}
+        for name, col in self.columns.items():
+            if name in self.categories:
+                data[name] = pd.Categorical.from_codes(col, categories=self.categories[name])
+            else:
+                data[name] = col
+        return pd.DataFrame(data, copy=False)
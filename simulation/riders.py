@@ -0,0 +1,105 @@
+import heapq
+from typing import Dict, List, Optional, Sequence, Tuple
+from .timeline import parse_clock
+
+# A shift is (rider, start minute, end minute) within the simulated day
+Shift = Tuple[int, int, int]
+
+
+def shifts_from_riders_per_minute(riders_per_minute: Sequence[int]) -> List[Shift]:
+    """
+    Turn a per-minute rider count into individual shifts: rider i is on duty whenever more than
+    i riders are scheduled, so the fleet only grows or shrinks at its highest-numbered riders.
+    """
+    shifts = []
+    fleet = max(riders_per_minute, default=0)
+    for rider in range(fleet):
+        start = None
+        for minute, riders in enumerate(riders_per_minute):
+            if riders > rider and start is None:
+                start = minute
+            elif riders <= rider and start is not None:
+                shifts.append((rider, start, minute))
+                start = None
+        if start is not None:
+            shifts.append((rider, start, len(riders_per_minute)))
+    return shifts
+
+
+def shifts_from_spec(spec: List[Dict], day_minutes: int = 24 * 60) -> List[Shift]:
+    """
+    Shifts listed explicitly as {"start": "HH:MM", "end": "HH:MM", "riders": n} entries.
+    Shifts that run past midnight are split into an evening and an early-morning part.
+    """
+    shifts = []
+    rider = 0
+    for entry in spec:
+        start, end = parse_clock(entry["start"]), parse_clock(entry["end"])
+        parts = [(start, end)] if start < end else [(start, day_minutes), (0, end)]
+        for _ in range(entry.get("riders", 1)):
+            shifts.extend((rider, s, e) for s, e in parts if s < e)
+            rider += 1
+    return shifts
+
+
+class RiderPool:
+    """
+    Riders of one fleet, tracked through a heap of (free-at time, rider) for riders on shift.
+    Riders keep their state across shifts and time blocks: a rider whose shift ends mid-ride
+    finishes the ride and leaves, and one whose shift starts mid-ride joins once it is done.
+    Acquiring and releasing a rider are O(log n); entries of riders that went off shift are
+    discarded lazily through a per-rider generation counter.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.busy_until = [0] * size
+        self.on_shift = [False] * size
+        self.generation = [0] * size
+        self.heap: List[Tuple[int, int, int]] = []  # (free-at time, rider, generation)
+
+    def start_shift(self, rider: int, now: int):
+        if self.on_shift[rider]:
+            return
+        self.on_shift[rider] = True
+        self.generation[rider] += 1
+        heapq.heappush(self.heap, (max(now, self.busy_until[rider]), rider, self.generation[rider]))
+
+    def end_shift(self, rider: int, now: int):
+        self.on_shift[rider] = False
+        self.generation[rider] += 1
+
+    def _drop_stale(self):
+        heap = self.heap
+        while heap and heap[0][2] != self.generation[heap[0][1]]:
+            heapq.heappop(heap)
+
+    def acquire(self, now: int) -> Optional[int]:
+        """
+        Take the rider that has been free the longest, or None if nobody on shift is free at now.
+        """
+        self._drop_stale()
+        if self.heap and self.heap[0][0] <= now:
+            return heapq.heappop(self.heap)[1]
+        return None
+
+    def release(self, rider: int, free_at: int):
+        """
+        Return an acquired rider to the pool, available again from free_at.
+        """
+        self.busy_until[rider] = free_at
+        if self.on_shift[rider]:
+            heapq.heappush(self.heap, (free_at, rider, self.generation[rider]))
+
+    def next_free(self) -> Optional[int]:
+        """
+        Time at which the next rider on shift becomes free.
+        """
+        self._drop_stale()
+        return self.heap[0][0] if self.heap else None
+
+    def available(self, now: int) -> int:
+        """
+        Number of riders on shift that are free at now (O(n), for reporting).
+        """
+        return sum(1 for t, rider, gen in self.heap if t <= now and gen == self.generation[rider])
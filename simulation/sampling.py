@@ -0,0 +1,45 @@
+import random
+import numpy as np
+from typing import Sequence
+
+
+class AliasTable:
+    """
+    Walker's alias method: after O(n) preprocessing, draws an index with probability
+    proportional to its weight in O(1), both one at a time and as a NumPy batch.
+    """
+
+    def __init__(self, weights: Sequence[float]):
+        weights = np.asarray(weights, dtype=float)
+        if len(weights) == 0 or (weights < 0).any() or weights.sum() <= 0:
+            raise ValueError("Alias table needs non-negative weights with a positive sum")
+        n = len(weights)
+        self.probabilities = weights / weights.sum()
+        scaled = self.probabilities * n
+        prob = np.ones(n)
+        alias = np.arange(n)
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] = scaled[l] + scaled[s] - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+        # Whatever is left is 1 up to rounding error
+        self.prob = prob
+        self.alias = alias
+        # Plain lists make the scalar path cheaper than NumPy element access
+        self._prob = prob.tolist()
+        self._alias = alias.tolist()
+        self.n = n
+
+    def sample(self, rng: random.Random = random) -> int:
+        u = rng.random() * self.n
+        i = int(u)
+        return i if u - i < self._prob[i] else self._alias[i]
+
+    def sample_array(self, size: int, rng: np.random.Generator) -> np.ndarray:
+        i = rng.integers(self.n, size=size)
+        return np.where(rng.random(size) < self.prob[i], i, self.alias[i])
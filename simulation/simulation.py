@@ -1,6 +1,12 @@
 import random
-from typing import List, Dict
+import numpy as np
+from typing import Iterator, List, Dict, Union
 from .city import City
+from .batch import BatchEngine, BLOCK_SIZE, run_block_size
+from .results import TripResults
+from .aggregators import TripSummary
+from .pipeline import CsvResultWriter, run_pipeline
+from .analytic import expected_summary, expected_co2_saved, compare_to_expected
 from .vehicle import Car, Bus, FatBike
 from utils import plotting
 
@@ -9,86 +15,141 @@ class Simulation:
     def __init__(self, city_name: str = "Eindhoven", num_trips: int = 100, seed: int = 42, use_real_data: bool = True):
         self.city = City(name=city_name, seed=seed, use_real_data=use_real_data)
         self.num_trips = num_trips
+        self.seed = seed
+        # Seed of the vectorized block streams; without a seed, fresh entropy drawn once and kept
+        # here so the run can be reproduced with Simulation(seed=sim.block_seed)
+        self.block_seed = seed if seed is not None else np.random.SeedSequence().entropy
         self.time_of_day = "rush_hour"  # default; can be changed dynamically
         self.vehicles = {
-            "Car": Car(),
-            "Bus": Bus(),
-            "FatBike": FatBike()
+            "Car": Car.shared(),
+            "Bus": Bus.shared(),
+            "FatBike": FatBike.shared()
         }
+        self._batch_engine = None
+        self._stream = 0  # advances on every vectorized run so repeated runs draw fresh trips
 
-    def run(self) -> List[Dict]:
+    def batch_engine(self) -> BatchEngine:
+        """
+        Lazily create the vectorized engine.
+        """
+        if self._batch_engine is None:
+            self._batch_engine = BatchEngine(self.city)
+        return self._batch_engine
+
+    def _run_batch(self, num_trips: int, time_of_day: str, workers: int, block_size: int = None,
+                   origin: str = None, destination: str = None) -> Dict[str, np.ndarray]:
+        if block_size is None:
+            block_size = run_block_size(num_trips)
+        columns = self.batch_engine().run_blocks(num_trips, self.block_seed, self._stream, time_of_day,
+                                                 origin, destination, workers=workers, block_size=block_size)
+        self._stream += 1
+        return columns
+
+    @staticmethod
+    def _check_workers(vectorized: bool, workers: int):
+        if workers > 1 and not vectorized:
+            raise ValueError("workers > 1 needs vectorized=True: the scalar path draws every trip "
+                             "from the global random module in one process")
+
+    def run(self, vectorized: bool = False, workers: int = 1, block_size: int = None) -> Union[List[Dict], TripResults]:
         """
         Run the simulation for a number of random trips.
-        Returns a list of detailed trip summaries.
+        Returns a list of detailed trip summaries (a columnar TripResults in vectorized mode).
+        vectorized: sample and evaluate all trips at once with the NumPy batch engine
+        workers: number of processes to shard the blocks of a vectorized run over; for a given
+                 seed and block size the trips are the same for any number of workers
+        block_size: trips per independently seeded block (default: run_block_size(num_trips))
         """
+        self._check_workers(vectorized, workers)
+        if vectorized:
+            columns = self._run_batch(self.num_trips, self.time_of_day, workers, block_size)
+            return self.batch_engine().to_results(columns)
         results = []
         for _ in range(self.num_trips):
             trip = self.city.generate_random_trip(time_of_day=self.time_of_day)
             results.append(trip.summary())
         return results
 
-    def run_for_od_pair(self, origin: str, destination: str, num_trips: int = None, time_of_day: str = None) -> List[Dict]:
+    def run_for_od_pair(self, origin: str, destination: str, num_trips: int = None, time_of_day: str = None,
+                        vectorized: bool = False, workers: int = 1,
+                        block_size: int = None) -> Union[List[Dict], TripResults]:
         """
         Run the simulation for a specific OD pair for a number of random trips.
-        Returns a list of detailed trip summaries.
+        Returns a list of detailed trip summaries (a columnar TripResults in vectorized mode).
+        vectorized, workers, block_size: as in run
         """
+        self._check_workers(vectorized, workers)
         if num_trips is None:
             num_trips = self.num_trips
         if time_of_day is None:
             time_of_day = self.time_of_day
+        if vectorized:
+            columns = self._run_batch(num_trips, time_of_day, workers, block_size, origin, destination)
+            return self.batch_engine().to_results(columns)
         results = []
         for _ in range(num_trips):
             trip = self.city.generate_random_trip_for_od(origin, destination, time_of_day)
             results.append(trip.summary())
         return results
 
-    def summarize_results(self, results: List[Dict], car_shift: float = 1.0):
+    def iter_results(self, chunk_size: int = BLOCK_SIZE, num_trips: int = None, workers: int = 1) -> Iterator[TripResults]:
+        """
+        Stream num_trips vectorized trips as TripResults chunks of chunk_size, generated lazily.
+        Each chunk has its own derived RNG stream, so the trips do not depend on the number of workers.
+        """
+        if num_trips is None:
+            num_trips = self.num_trips
+        engine = self.batch_engine()
+        blocks = engine.iter_blocks(num_trips, self.block_seed, self._stream, self.time_of_day,
+                                    workers=workers, block_size=chunk_size)
+        self._stream += 1
+        for columns in blocks:
+            yield engine.to_results(columns)
+
+    def run_streaming(self, filename: str = "simulation_results.csv", chunk_size: int = BLOCK_SIZE,
+                      workers: int = 1) -> TripSummary:
+        """
+        Run the simulation in constant memory: chunks are written to CSV as they are produced
+        (skipped if filename is None) and folded into a TripSummary, which is returned.
+        """
+        summary = TripSummary(self.vehicles)
+        writer = CsvResultWriter(filename) if filename is not None else None
+        run_pipeline(self.iter_results(chunk_size=chunk_size, workers=workers),
+                     [summary] if writer is None else [summary, writer])
+        if writer is not None:
+            print(f"Results written to {filename}" if writer.rows_written else "No results to write.")
+        return summary
+
+    def summarize_results(self, results: Union[List[Dict], TripResults, TripSummary], car_shift: float = 1.0):
         """
         Summarize average metrics across all trips per vehicle type and report weather and delays.
         Also computes and prints total CO2 saved if all trips shifted from car to fat bike.
+        results: list of trip summaries, a columnar TripResults or an already accumulated TripSummary
         car_shift: fraction of trips shifted from car to fat bike (0-1)
         """
-        from collections import Counter
-        vehicle_stats = {}
-        weather_counter = Counter()
-        total_trips = len(results)
-        total_delay = 0
-        delay_threshold = 0.1  # hours, e.g., 6 minutes
-        delayed_trips = 0
-        total_distance = 0
-
-        for trip in results:
-            v = trip['vehicle']
-            vehicle_stats.setdefault(v, {'emissions': 0, 'duration': 0, 'count': 0, 'distance': 0})
-            vehicle_stats[v]['emissions'] += trip['emissions_total_g']
-            vehicle_stats[v]['duration'] += trip['duration_hr']
-            vehicle_stats[v]['count'] += 1
-            vehicle_stats[v]['distance'] += trip['distance_km']
-            weather_counter[trip['weather']] += 1
-            total_distance += trip['distance_km']
-            # Delay: if duration is more than expected for clear weather by threshold
-            expected_speed = self.vehicles[v].get_speed(trip['traffic_level'])
-            expected_time = trip['distance_km'] / expected_speed if expected_speed > 0 else float('inf')
-            delay = trip['duration_hr'] - expected_time
-            if delay > delay_threshold:
-                delayed_trips += 1
-                total_delay += delay
+        if not isinstance(results, TripSummary):
+            accumulator = TripSummary(self.vehicles)
+            accumulator.update(results)
+            results = accumulator
+        summary = results.result()
+        vehicle_stats = {v: summary[v] for v in results.vehicle_stats}
+        total_trips = summary["total_trips"]
+        total_distance = summary["total_distance_km"]
+        delayed_trips = summary["delayed_trips"]
 
         print(f"\n--- Simulation Summary for {self.num_trips} trips ({self.time_of_day}) ---")
         for v, stats in vehicle_stats.items():
-            avg_emissions = stats['emissions'] / stats['count']
-            avg_time = stats['duration'] / stats['count']
-            print(f"{v:8s} | Avg Emissions: {avg_emissions:.2f} g | Avg Time: {avg_time:.2f} h")
-        print(f"\nWeather distribution: {dict(weather_counter)}")
+            print(f"{v:8s} | Avg Emissions: {stats['avg_emissions']:.2f} g | Avg Time: {stats['avg_time']:.2f} h")
+        print(f"\nWeather distribution: {summary['weather_distribution']}")
         if delayed_trips > 0:
-            print(f"Delayed trips (>6min): {delayed_trips} ({100*delayed_trips/total_trips:.1f}%), Avg delay: {total_delay/delayed_trips*60:.1f} min")
+            print(f"Delayed trips (>6min): {delayed_trips} ({100*delayed_trips/total_trips:.1f}%), Avg delay: {summary['avg_delay_min']:.1f} min")
         else:
             print("No significant delays detected.")
 
         # --- CO2 savings calculation ---
         if 'Car' in vehicle_stats and 'FatBike' in vehicle_stats:
-            avg_emissions_car = vehicle_stats['Car']['emissions'] / vehicle_stats['Car']['count']
-            avg_emissions_fatbike = vehicle_stats['FatBike']['emissions'] / vehicle_stats['FatBike']['count']
+            avg_emissions_car = vehicle_stats['Car']['avg_emissions']
+            avg_emissions_fatbike = vehicle_stats['FatBike']['avg_emissions']
             avg_distance = total_distance / total_trips if total_trips > 0 else 0
             n_trips = total_trips
             co2_saved = (avg_emissions_car - avg_emissions_fatbike) * avg_distance * n_trips * car_shift / avg_distance if avg_distance > 0 else 0
@@ -96,25 +157,49 @@ class Simulation:
         else:
             print("\nCO₂ savings calculation not possible (missing Car or FatBike data).")
 
+    def expected_results(self, car_shift: float = 1.0) -> Dict:
+        """
+        Exact expected metrics for the current time of day, computed by enumerating the discrete
+        trip space instead of sampling. Includes the expected CO2 saving for num_trips trips.
+        """
+        expected = expected_summary(self.city, self.time_of_day)
+        expected["co2_saved_g"] = expected_co2_saved(expected, self.num_trips, car_shift)
+        return expected
+
+    def check_against_expected(self, results: Union[List[Dict], TripResults, TripSummary]):
+        """
+        Print simulated vs exact per-vehicle means with z-scores, as a ground-truth check of the engine.
+        """
+        if not isinstance(results, TripSummary):
+            accumulator = TripSummary(self.vehicles)
+            accumulator.update(results)
+            results = accumulator
+        print(f"\n--- Monte Carlo vs exact expectation ({self.time_of_day}) ---")
+        for metric, simulated, exact, z in compare_to_expected(results, self.expected_results()):
+            print(f"{metric:32s} | Simulated: {simulated:10.3f} | Exact: {exact:10.3f} | z = {z:+.2f}")
+
     def set_time_of_day(self, time_of_day: str):
         """
         Set the time of day for the simulation (affects traffic).
         """
         self.time_of_day = time_of_day
 
-    def write_results_to_csv(self, results: List[Dict], filename: str = "simulation_results.csv"):
+    def write_results_to_csv(self, results: Union[List[Dict], TripResults], filename: str = "simulation_results.csv"):
         """
         Write the simulation results to a CSV file.
         """
-        if not results:
+        if not len(results):
             print("No results to write.")
             return
-        import csv
-        keys = list(results[0].keys())
-        with open(filename, mode="w", newline='', encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=keys)
-            writer.writeheader()
-            writer.writerows(results)
+        if isinstance(results, TripResults):
+            run_pipeline([results], [CsvResultWriter(filename)])
+        else:
+            import csv
+            keys = list(results[0].keys())
+            with open(filename, mode="w", newline='', encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=keys)
+                writer.writeheader()
+                writer.writerows(results)
         print(f"Results written to {filename}")
 
 
@@ -0,0 +1,160 @@
+import math
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from .riders import RiderPool
+from .bundle import load_city_bundle
+from utils.geo import project_km
+
+
+class GridIndex:
+    """
+    Uniform grid over planar (km) coordinates for nearest-neighbour queries on moving points.
+    Inserting, removing and moving a point are O(1); a nearest query searches rings of cells
+    outward from the query point and stops once no unvisited cell can hold a closer point.
+    """
+
+    def __init__(self, cell_km: float = 0.5):
+        self.cell_km = cell_km
+        self.cells: Dict[Tuple[int, int], Dict[int, Tuple[float, float]]] = {}
+        self.points: Dict[int, Tuple[int, int]] = {}
+        # Bounding box of cells ever used, to bound the ring search
+        self.min_cell = [math.inf, math.inf]
+        self.max_cell = [-math.inf, -math.inf]
+
+    def _key(self, x: float, y: float) -> Tuple[int, int]:
+        return int(math.floor(x / self.cell_km)), int(math.floor(y / self.cell_km))
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def __contains__(self, item: int) -> bool:
+        return item in self.points
+
+    def insert(self, item: int, x: float, y: float):
+        if item in self.points:
+            self.remove(item)
+        key = self._key(x, y)
+        self.cells.setdefault(key, {})[item] = (x, y)
+        self.points[item] = key
+        for axis in (0, 1):
+            self.min_cell[axis] = min(self.min_cell[axis], key[axis])
+            self.max_cell[axis] = max(self.max_cell[axis], key[axis])
+
+    def remove(self, item: int):
+        key = self.points.pop(item, None)
+        if key is None:
+            return
+        cell = self.cells[key]
+        del cell[item]
+        if not cell:
+            del self.cells[key]
+
+    def move(self, item: int, x: float, y: float):
+        self.insert(item, x, y)
+
+    def nearest(self, x: float, y: float) -> Optional[Tuple[int, float]]:
+        """
+        (item, distance in km) of the point closest to (x, y), or None if the index is empty.
+        """
+        if not self.points:
+            return None
+        cx, cy = self._key(x, y)
+        max_ring = int(max(cx - self.min_cell[0], self.max_cell[0] - cx,
+                           cy - self.min_cell[1], self.max_cell[1] - cy, 0))
+        best, best_dist = None, math.inf
+        for ring in range(max_ring + 1):
+            for key in self._ring(cx, cy, ring):
+                cell = self.cells.get(key)
+                if not cell:
+                    continue
+                for item, (px, py) in cell.items():
+                    dist = math.hypot(px - x, py - y)
+                    if dist < best_dist or (dist == best_dist and item < best):
+                        best, best_dist = item, dist
+            # Any point in a further ring is at least ring * cell_km away
+            if best is not None and best_dist <= ring * self.cell_km:
+                break
+        return best, best_dist
+
+    @staticmethod
+    def _ring(cx: int, cy: int, ring: int) -> List[Tuple[int, int]]:
+        if ring == 0:
+            return [(cx, cy)]
+        keys = [(cx + dx, cy + dy) for dx in (-ring, ring) for dy in range(-ring, ring + 1)]
+        keys += [(cx + dx, cy + dy) for dy in (-ring, ring) for dx in range(-ring + 1, ring)]
+        return keys
+
+
+class PlaceCoordinates:
+    """
+    Planar (km) coordinates of the City's places, from POI coordinates and neighbourhood centroids.
+    """
+
+    def __init__(self, places: List[str], coordinates: Dict[str, Tuple[float, float]] = None):
+        coordinates = coordinates if coordinates is not None else load_city_bundle().place_coordinates()
+        missing = [p for p in places if p not in coordinates]
+        if missing:
+            raise ValueError(f"No coordinates for places: {missing}")
+        lat = np.array([coordinates[p][0] for p in places])
+        lon = np.array([coordinates[p][1] for p in places])
+        self.ref = (float(lat.mean()), float(lon.mean()))
+        x, y = project_km(lat, lon, *self.ref)
+        self.x = x.tolist()
+        self.y = y.tolist()
+
+
+class SpatialRiderPool(RiderPool):
+    """
+    RiderPool whose free riders have a position and are handed out nearest-first.
+    Riders that become free are moved from the free-at heap into a grid index at their
+    current position (where their last ride ended), so dispatch is a nearest-neighbour query.
+    """
+
+    def __init__(self, size: int, x: List[float], y: List[float], cell_km: float = 0.5):
+        super().__init__(size)
+        self.x = list(x)
+        self.y = list(y)
+        self.grid = GridIndex(cell_km)
+
+    def _settle(self, now: int):
+        heap = self.heap
+        while True:
+            self._drop_stale()
+            if not heap or heap[0][0] > now:
+                return
+            rider = super().acquire(now)
+            self.grid.insert(rider, self.x[rider], self.y[rider])
+
+    def end_shift(self, rider: int, now: int):
+        super().end_shift(rider, now)
+        self.grid.remove(rider)
+
+    def acquire(self, now: int) -> Optional[int]:
+        self._settle(now)
+        if not self.grid:
+            return None
+        rider = min(self.grid.points)
+        self.grid.remove(rider)
+        return rider
+
+    def acquire_nearest(self, now: int, x: float, y: float) -> Optional[Tuple[int, float]]:
+        """
+        Take the free rider closest to (x, y); returns (rider, distance in km) or None.
+        """
+        self._settle(now)
+        found = self.grid.nearest(x, y)
+        if found is not None:
+            self.grid.remove(found[0])
+        return found
+
+    def release(self, rider: int, free_at: int, x: float = None, y: float = None):
+        """
+        Return a rider to the pool from free_at, at the position where the ride ends.
+        """
+        if x is not None:
+            self.x[rider], self.y[rider] = x, y
+        super().release(rider, free_at)
+
+    def available(self, now: int) -> int:
+        self._settle(now)
+        return len(self.grid)
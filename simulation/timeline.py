@@ -0,0 +1,128 @@
+import numpy as np
+from typing import Dict, List, Sequence
+
+DAY_MINUTES = 24 * 60
+
+
+def parse_clock(value: str) -> int:
+    """
+    Minute of the day for an "H:MM" / "HH:MM" string ("24:00" is the end of the day).
+    """
+    hours, minutes = value.split(":")
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours <= 24 and 0 <= minutes < 60) or hours * 60 + minutes > DAY_MINUTES:
+        raise ValueError(f"Invalid time of day: {value}")
+    return hours * 60 + minutes
+
+
+class DemandTimeline:
+    """
+    A day's demand profile compiled into arrays indexed by time slot (slots_per_minute slots per
+    minute): time-block id, arrival rate per scenario (requests per minute) and scheduled riders.
+    Looking up the block, rate or riders at a given minute is a single array access.
+    """
+
+    def __init__(self, block_names: List[str], block_ids: np.ndarray, rates: Dict[str, np.ndarray],
+                 block_riders: Sequence[int], slots_per_minute: int = 1):
+        self.block_names = list(block_names)
+        self.block_ids = block_ids
+        self.rates = rates
+        self.slots_per_minute = slots_per_minute
+        self.slot_minutes = 1.0 / slots_per_minute
+        self.set_block_riders(dict(zip(self.block_names, block_riders)))
+
+    def set_block_riders(self, riders: Dict[str, int]):
+        """
+        Scheduled riders per time block, expanded to the slots.
+        """
+        self.block_riders = np.array([riders[name] for name in self.block_names], dtype=np.int64)
+        self.riders = self.block_riders[self.block_ids]
+
+    def block_minutes(self) -> Dict[str, float]:
+        """
+        Length of every time block in minutes.
+        """
+        counts = np.bincount(self.block_ids, minlength=len(self.block_names)) / self.slots_per_minute
+        return {name: float(c) for name, c in zip(self.block_names, counts)}
+
+    @classmethod
+    def from_blocks(cls, blocks: Dict[str, Dict], scenarios: Sequence[str], slots_per_minute: int = 1,
+                    curve: Dict = None) -> "DemandTimeline":
+        """
+        Compile time blocks ({"start": "HH:MM", "end": "HH:MM", "riders": n, <scenario>: daily demand})
+        into slot arrays. A block's demand is spread evenly over its minutes, unless a demand curve
+        (see curve_rates) overrides the rates. Blocks must cover the day without overlapping;
+        blocks whose end is before their start run past midnight.
+        """
+        slots = DAY_MINUTES * slots_per_minute
+        block_names = list(blocks)
+        block_ids = np.full(slots, -1, dtype=np.int16)
+        for b, info in enumerate(blocks.values()):
+            start = parse_clock(info["start"]) * slots_per_minute
+            end = parse_clock(info["end"]) * slots_per_minute
+            ranges = [(start, end)] if start < end else [(start, slots), (0, end)]
+            for lo, hi in ranges:
+                if (block_ids[lo:hi] >= 0).any():
+                    raise ValueError(f"Time block {block_names[b]} overlaps another block")
+                block_ids[lo:hi] = b
+        if (block_ids < 0).any():
+            first = int(np.argmax(block_ids < 0)) // slots_per_minute
+            raise ValueError(f"No time block covers {first // 60:02d}:{first % 60:02d}")
+
+        block_minutes = np.bincount(block_ids, minlength=len(block_names)) / slots_per_minute
+        infos = list(blocks.values())
+        if curve is not None:
+            rates = curve_rates(curve, scenarios, slots_per_minute)
+        else:
+            rates = {s: np.array([info[s] for info in infos], dtype=float)[block_ids] / block_minutes[block_ids]
+                     for s in scenarios}
+        return cls(block_names, block_ids, rates, [info["riders"] for info in infos], slots_per_minute)
+
+    def slot(self, minute: float) -> int:
+        return int(minute * self.slots_per_minute) % len(self.block_ids)
+
+    def block_at(self, minute: float) -> str:
+        return self.block_names[self.block_ids[self.slot(minute)]]
+
+    def rate_at(self, scenario: str, minute: float) -> float:
+        return float(self.rates[scenario][self.slot(minute)])
+
+    def riders_at(self, minute: float) -> int:
+        return int(self.riders[self.slot(minute)])
+
+    def riders_per_minute(self) -> List[int]:
+        """
+        Scheduled riders at the start of every minute of the day.
+        """
+        return self.riders[::self.slots_per_minute].tolist()
+
+    def block_changes(self) -> List[tuple]:
+        """
+        (minute, block name) for every minute at which a new time block starts, beginning at 0.
+        """
+        ids = self.block_ids
+        starts = np.flatnonzero(np.concatenate(([True], ids[1:] != ids[:-1])))
+        return [(float(s) / self.slots_per_minute, self.block_names[ids[s]]) for s in starts]
+
+
+def curve_rates(curve: Dict, scenarios: Sequence[str], slots_per_minute: int = 1) -> Dict[str, np.ndarray]:
+    """
+    Arrival rates per slot from a demand curve:
+    {"interpolate": true, "points": [{"time": "HH:MM", <scenario>: requests per hour, ...}, ...]}.
+    Between points the rate is interpolated linearly (wrapping around midnight) or, without
+    interpolation, held constant from each point until the next.
+    """
+    points = sorted(curve["points"], key=lambda p: parse_clock(p["time"]))
+    times = np.array([parse_clock(p["time"]) for p in points], dtype=float)
+    slot_times = np.arange(DAY_MINUTES * slots_per_minute) / slots_per_minute
+    rates = {}
+    for s in scenarios:
+        per_hour = np.array([p[s] for p in points], dtype=float)
+        if curve.get("interpolate", True):
+            values = np.interp(slot_times, times, per_hour, period=DAY_MINUTES)
+        else:
+            # Step function; before the first point the last point of the previous day applies
+            index = np.searchsorted(times, slot_times, side="right") - 1
+            values = per_hour[index]
+        rates[s] = values / 60
+    return rates
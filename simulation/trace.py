@@ -0,0 +1,73 @@
+import json
+import numpy as np
+from typing import List
+
+# Event kinds recorded in a trace
+REQUEST, ASSIGN, COMPLETE, CANCEL = 0, 1, 2, 3
+KIND_NAMES = ("request", "assign", "complete", "cancel")
+
+TRACE_DTYPE = np.dtype([
+    ("time", np.float64),     # simulated minute of the day
+    ("kind", np.int8),        # REQUEST / ASSIGN / COMPLETE / CANCEL
+    ("scenario", np.int8),    # index into the simulation's scenarios
+    ("request", np.int32),    # index of the request in its scenario's ArrivalStream
+    ("rider", np.int32),      # rider id, -1 if not applicable
+    ("wait", np.float32),     # minutes waited (assign/cancel), NaN otherwise
+])
+
+
+class EventTrace:
+    """
+    Fixed-size ring buffer of simulation events in a NumPy structured array. Recording never
+    allocates; once full, the oldest events are overwritten (and counted in dropped).
+    """
+
+    def __init__(self, capacity: int = 1_000_000):
+        if capacity <= 0:
+            raise ValueError("Trace capacity must be positive")
+        self.capacity = capacity
+        self.buffer = np.zeros(capacity, dtype=TRACE_DTYPE)
+        self.recorded = 0
+
+    def record(self, time: float, kind: int, scenario: int, request: int, rider: int = -1, wait: float = np.nan):
+        self.buffer[self.recorded % self.capacity] = (time, kind, scenario, request, rider, wait)
+        self.recorded += 1
+
+    def __len__(self) -> int:
+        return min(self.recorded, self.capacity)
+
+    @property
+    def dropped(self) -> int:
+        return max(0, self.recorded - self.capacity)
+
+    def events(self) -> np.ndarray:
+        """
+        Recorded events, oldest first.
+        """
+        if self.recorded <= self.capacity:
+            return self.buffer[:self.recorded]
+        start = self.recorded % self.capacity
+        return np.concatenate((self.buffer[start:], self.buffer[:start]))
+
+    def clear(self):
+        self.recorded = 0
+
+    def to_jsonl(self, filename: str, scenarios: List[str] = None):
+        """
+        Write the events as JSON lines, with kind (and scenario, if names are given) as labels.
+        """
+        with open(filename, "w") as f:
+            for event in self.events().tolist():
+                time, kind, scenario, request, rider, wait = event
+                record = {
+                    "time": time,
+                    "kind": KIND_NAMES[kind],
+                    "scenario": scenarios[scenario] if scenarios else scenario,
+                    "request": request,
+                }
+                if rider >= 0:
+                    record["rider"] = rider
+                if wait == wait:  # not NaN
+                    record["wait"] = wait
+                f.write(json.dumps(record) + "\n")
+        print(f"Trace written to {filename} ({len(self)} events, {self.dropped} dropped)")
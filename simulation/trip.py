@@ -1,27 +1,44 @@
 from .vehicle import Vehicle
+from .lookup import MAX_TRAFFIC_LEVEL, VehicleTable
 
 class Trip:
-    def __init__(self, vehicle: Vehicle, distance_km: float, traffic_level: int, passengers: int = 1):
-        self.vehicle = vehicle
+    # Fixed attribute layout: no per-instance __dict__, since simulations keep many trips alive
+    __slots__ = ("vehicle", "distance_km", "traffic_level", "passengers", "origin", "destination",
+                 "weather", "weather_speed_factor", "weather_emission_factor", "table", "weather_code")
+
+    def __init__(self, vehicle: Vehicle, distance_km: float, traffic_level: int, passengers: int = 1,
+                 origin: str = None, destination: str = None, weather: str = None,
+                 weather_speed_factor: float = 1.0, weather_emission_factor: float = 1.0,
+                 table: VehicleTable = None, weather_code: int = None):
+        self.vehicle = vehicle  # shared Vehicle instance (see Vehicle.shared)
         self.distance_km = distance_km
         self.traffic_level = traffic_level
         self.passengers = passengers
-        # Weather-related attributes (set externally by City)
-        self.weather = None
-        self.weather_speed_factor = 1.0
-        self.weather_emission_factor = 1.0
-        # Origin/destination (set externally by City)
-        self.origin = None
-        self.destination = None
+        self.origin = origin
+        self.destination = destination
+        # Weather-related attributes
+        self.weather = weather
+        self.weather_speed_factor = weather_speed_factor
+        self.weather_emission_factor = weather_emission_factor
+        # Compiled VehicleTable and weather index; the Vehicle formulas are used without them
+        self.table = table
+        self.weather_code = weather_code
 
         if passengers > self.vehicle.capacity:
             raise ValueError(f"Vehicle capacity exceeded: {passengers} > {self.vehicle.capacity}")
 
+    def get_speed_kmh(self) -> float:
+        if self.table is not None and 0 <= self.traffic_level <= MAX_TRAFFIC_LEVEL:
+            return self.table.speed_rows[self.traffic_level][self.weather_code]
+        return self.vehicle.get_speed(self.traffic_level) * self.weather_speed_factor
+
     def get_duration_hours(self) -> float:
-        speed = self.vehicle.get_speed(self.traffic_level) * self.weather_speed_factor
+        speed = self.get_speed_kmh()
         return self.distance_km / speed if speed > 0 else float('inf')
 
     def get_operational_emissions(self) -> float:
+        if self.table is not None:
+            return self.table.emissions_per_km_list[self.weather_code] * self.distance_km
         return self.vehicle.emissions_per_km * self.distance_km * self.weather_emission_factor
 
     def get_total_emissions(self) -> float:
@@ -42,7 +59,7 @@ class Trip:
             "traffic_level": self.traffic_level,
             "weather": self.weather,
             "passengers": self.passengers,
-            "speed_kmh": self.vehicle.get_speed(self.traffic_level) * self.weather_speed_factor,
+            "speed_kmh": self.get_speed_kmh(),
             "duration_hr": self.get_duration_hours(),
             "emissions_total_g": self.get_total_emissions(),
             "emissions_per_passenger_g": self.get_emissions_per_passenger()
@@ -1,16 +1,15 @@
 import tkinter as tk
 from tkinter import ttk
 import tkinter.messagebox as messagebox
-import geopandas as gpd
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
-import json
+from matplotlib.collections import PolyCollection
 from PIL import Image, ImageTk
-import csv
 import os
 
 from .simulation import Simulation
+from .bundle import load_city_bundle
 from utils import plotting
 
 class UI:
@@ -21,23 +20,20 @@ class UI:
         # self.destination = self.sim.city.zones
         self.weather_types = self.sim.city.weather_types
         self.base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        geojson_path = os.path.join(self.base_dir, "data", "buurten.geojson")
-        self.zones_gdf = gpd.read_file(geojson_path)
+        # Neighbourhood outlines, OD pairs and destination coordinates from the city bundle
+        self.bundle = load_city_bundle()
         self.launch_ui()
 
-    def load_csv(self, csv_path):
-        od_map = {}
-        with open(csv_path, newline='', encoding='utf-8') as csvfile:
-            reader = csv.reader(csvfile)
-            for row in reader:
-                if not row or not row[0].strip() or not row[1].strip():
-                    continue
-                origin = row[0].strip()
-                destination = row[1].strip()
-                if origin not in od_map:
-                    od_map[origin] = set()
-                od_map[origin].add(destination)
-        return od_map
+    def plot_zones(self, ax, zones=None, **style):
+        """
+        Draw neighbourhood outlines (all of them, or the named ones) as one PolyCollection.
+        """
+        polygons = self.bundle.zone_polygons(zones)
+        if not polygons:
+            return
+        style.setdefault("edgecolor", "black")
+        ax.add_collection(PolyCollection(polygons, facecolor=style.pop("color", None), **style))
+        ax.autoscale_view()
 
     def apply_style(self):
         self.bg_color = "#F0FFFF"
@@ -59,11 +55,10 @@ class UI:
         self.container.configure(style="TFrame")
 
     def draw_map(self, selected_zone, ax, dest=None):
-        self.zones_gdf.plot(ax=ax, color=self.bg_color, edgecolor='black')
-        for zone in self.origin:
-            self.zones_gdf[self.zones_gdf['buurtnaam'] == zone].plot(ax=ax, color=self.fg_color, edgecolor='black')
+        self.plot_zones(ax, color=self.bg_color, edgecolor='black')
+        self.plot_zones(ax, self.origin, color=self.fg_color, edgecolor='black')
         if selected_zone:
-            self.zones_gdf[self.zones_gdf['buurtnaam'] == selected_zone].plot(ax=ax, color=self.accent_color, edgecolor='black')
+            self.plot_zones(ax, [selected_zone], color=self.accent_color, edgecolor='black')
         if dest != None:
             dx, dy = self.dest_coords[dest]
             ax.scatter(dx, dy, color='black', marker='x', s=80, label="Destinations")
@@ -82,21 +77,19 @@ class UI:
         self.ax_tab2.clear()
 
         # Calculate aspect ratio again to maintain it
-        bounds = self.zones_gdf.total_bounds
+        bounds = self.bundle.total_bounds()
         x_range = bounds[2] - bounds[0]
         y_range = bounds[3] - bounds[1]
         aspect_ratio = y_range / x_range
         self.ax_tab2.set_aspect(aspect_ratio)
         
         # Plot all zones
-        self.zones_gdf.plot(ax=self.ax_tab2, color='azure', edgecolor='black', alpha=0.5)
+        self.plot_zones(self.ax_tab2, color='azure', edgecolor='black', alpha=0.5)
         
         # Highlight origin
         origin = self.start_var.get()
         if origin:
-            self.zones_gdf[self.zones_gdf['buurtnaam'] == origin].plot(
-                ax=self.ax_tab2, color=self.accent_color, edgecolor='black', alpha=0.7
-            )
+            self.plot_zones(self.ax_tab2, [origin], color=self.accent_color, edgecolor='black', alpha=0.7)
         
         # Plot destination marker
         if dest and dest in self.dest_coords:
@@ -165,13 +158,10 @@ class UI:
         self.status_var.set(f"Origin: {self.start}, Destination: {self.end}, Time: {self.tod}, Weather: {self.weather}")
 
     def launch_ui(self):
-        csv_path = os.path.join(self.base_dir, "simulation", "Origin to POI.csv")
-        self.od_map = self.load_csv(csv_path)
-        json_path = os.path.join(self.base_dir, "data", "destination_coordinates.json")
-        with open(json_path, 'r', encoding='utf-8') as file:
-            self.dest_coords = json.load(file)
+        self.od_map = self.bundle.destinations_by_origin()
+        self.dest_coords = {poi: {"latitude": lat, "longitude": lon}
+                            for poi, (lat, lon) in zip(self.bundle.pois, self.bundle.poi_coordinates.tolist())}
         self.origin = sorted(self.od_map.keys())
-        self.origin.remove('\ufeffOrigin')
     
         # Create the main window
         self.root = tk.Tk()
@@ -358,7 +348,7 @@ class UI:
         self.ax_tab2 = fig.add_subplot(111)
 
         # Calculate proper aspect ratio based on coordinates
-        bounds = self.zones_gdf.total_bounds
+        bounds = self.bundle.total_bounds()
         x_range = bounds[2] - bounds[0]
         y_range = bounds[3] - bounds[1]
         aspect_ratio = y_range / x_range
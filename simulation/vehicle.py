@@ -2,6 +2,9 @@ from abc import ABC, abstractmethod
 from config.vehicle_config import vehicle_config
 
 class Vehicle(ABC):
+    # One shared (flyweight) instance per vehicle class, see shared()
+    _shared = {}
+
     def __init__(self, name:str, speed_kmh: float, emissions_per_km: float, embodied_emissions: float, capacity: int = 1):
         self.name = name # Name of the vehicle
         self.speed_kmh = speed_kmh # Speed in km/h
@@ -15,6 +18,17 @@ class Vehicle(ABC):
         """
         return self.emissions_per_km * distance_km + self.embodied_emissions
 
+    @classmethod
+    def shared(cls) -> "Vehicle":
+        """
+        Return the shared instance of this vehicle type. Vehicles carry no per-trip state,
+        so every Trip can reference the same object instead of allocating its own.
+        """
+        instance = Vehicle._shared.get(cls)
+        if instance is None:
+            instance = Vehicle._shared[cls] = cls()
+        return instance
+
     @abstractmethod
     def get_speed(self, traffic_level: str) -> float:
         """
@@ -0,0 +1,165 @@
+import os
+import json
+import numpy as np
+import shapely
+from shapely import STRtree
+from typing import List, Tuple
+from .bundle import CityBundle, load_city_bundle
+from utils.geo import project_km
+
+# Bump when the layout of the cached raster changes
+ZONE_INDEX_VERSION = 1
+ZONE_INDEX_DIR = "data/.cache/zone_index"
+# Raster cells that lie entirely inside one neighbourhood are answered without a polygon test
+ZONE_CELL_KM = 0.1
+# Raster labels besides zone ids: cells that need an exact test, and cells outside every zone
+BOUNDARY, OUTSIDE = -1, -2
+
+
+class ZoneIndex:
+    """
+    Maps coordinates to neighbourhoods (buurten) in batches. Polygons are kept in planar km
+    around the city centre in an STRtree. A raster of ZONE_CELL_KM cells, cached on disk next to
+    the city bundle, labels every cell that lies entirely inside one neighbourhood or outside all
+    of them, so only points in cells crossed by a boundary need an exact point-in-polygon test.
+    """
+
+    def __init__(self, bundle: CityBundle = None, cell_km: float = ZONE_CELL_KM, cache_dir: str = ZONE_INDEX_DIR):
+        self.bundle = bundle if bundle is not None else load_city_bundle()
+        self.zones: List[str] = self.bundle.zones
+        centroids = np.asarray(self.bundle.zone_centroid)
+        self.ref = (float(centroids[:, 0].mean()), float(centroids[:, 1].mean()))
+        vertices = np.asarray(self.bundle.ring_vertices)
+        x, y = project_km(vertices[:, 1], vertices[:, 0], *self.ref)
+        offsets = np.asarray(self.bundle.ring_offsets)
+        self.polygons = np.array([shapely.polygons(np.column_stack((x[a:b], y[a:b])))
+                                  for a, b in zip(offsets[:-1], offsets[1:])], dtype=object)
+        self.polygon_zone = np.asarray(self.bundle.ring_zone, dtype=np.int64)
+        self.tree = STRtree(self.polygons)
+        self.cell_km = cell_km
+        self.raster, self.candidates, self.origin = self._load_raster(cache_dir)
+
+    def _build_raster(self) -> Tuple[np.ndarray, np.ndarray, Tuple[float, float]]:
+        x0, y0, x1, y1 = shapely.total_bounds(self.polygons)
+        nx, ny = int(np.ceil((x1 - x0) / self.cell_km)), int(np.ceil((y1 - y0) / self.cell_km))
+        ix, iy = np.meshgrid(np.arange(nx), np.arange(ny), indexing="ij")
+        cx, cy = x0 + ix.ravel() * self.cell_km, y0 + iy.ravel() * self.cell_km
+        cells = shapely.box(cx, cy, cx + self.cell_km, cy + self.cell_km)
+        raster = np.full(nx * ny, OUTSIDE, dtype=np.int16)
+        cell, polygon = self.tree.query(cells, predicate="intersects")
+        raster[cell] = BOUNDARY
+        cell, polygon = self.tree.query(cells, predicate="within")
+        raster[cell] = self.polygon_zone[polygon]
+        # Nearest-polygon candidates per cell: with d the distance from the cell centre to the
+        # nearest polygon and h half the cell diagonal, the polygon nearest to any point of the
+        # cell is within d + 2h of the centre
+        centres = shapely.points(cx + self.cell_km / 2, cy + self.cell_km / 2)
+        _, nearest_dist = self.tree.query_nearest(centres, return_distance=True, all_matches=False)
+        reach = nearest_dist + self.cell_km * np.sqrt(2)
+        cell, polygon = self.tree.query(centres, predicate="dwithin", distance=reach)
+        counts = np.bincount(cell, minlength=nx * ny)
+        candidates = np.full((nx * ny, max(1, counts.max())), -1, dtype=np.int32)
+        order = np.lexsort((polygon, cell))
+        cell, polygon = cell[order], polygon[order]
+        slot = np.arange(len(cell)) - np.repeat(np.cumsum(counts) - counts, counts)
+        candidates[cell, slot] = polygon
+        return raster.reshape(nx, ny), candidates.reshape(nx, ny, -1), (float(x0), float(y0))
+
+    def _load_raster(self, cache_dir: str) -> Tuple[np.ndarray, np.ndarray, Tuple[float, float]]:
+        """
+        The cell raster and nearest-polygon candidates from the cache, rebuilt when the bundle
+        sources or the cell size changed.
+        """
+        key = {"version": ZONE_INDEX_VERSION, "sources": self.bundle.manifest["sources"], "cell_km": self.cell_km}
+        manifest_path = os.path.join(cache_dir, "manifest.json")
+        paths = {name: os.path.join(cache_dir, f"{name}.npy") for name in ("raster", "candidates")}
+        if os.path.exists(manifest_path) and all(os.path.exists(path) for path in paths.values()):
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest["key"] == key:
+                return (np.load(paths["raster"], mmap_mode="r"), np.load(paths["candidates"], mmap_mode="r"),
+                        tuple(manifest["origin"]))
+        raster, candidates, origin = self._build_raster()
+        os.makedirs(cache_dir, exist_ok=True)
+        for name, array in (("raster", raster), ("candidates", candidates)):
+            tmp = os.path.join(cache_dir, f"{name}.{os.getpid()}.tmp.npy")
+            np.save(tmp, array)
+            os.replace(tmp, paths[name])
+        tmp = os.path.join(cache_dir, f"manifest.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "origin": origin}, f)
+        os.replace(tmp, manifest_path)
+        return raster, candidates, origin
+
+    def project(self, lat, lon) -> Tuple[np.ndarray, np.ndarray]:
+        x, y = project_km(lat, lon, *self.ref)
+        return np.atleast_1d(x), np.atleast_1d(y)
+
+    def _cells(self, x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Raster cell (ix, iy) of every point and whether it falls within the raster.
+        """
+        ix = np.floor((x - self.origin[0]) / self.cell_km).astype(np.int64)
+        iy = np.floor((y - self.origin[1]) / self.cell_km).astype(np.int64)
+        nx, ny = self.raster.shape
+        return ix, iy, (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)
+
+    def _cell_labels(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        ix, iy, inside = self._cells(x, y)
+        labels = np.full(len(x), OUTSIDE, dtype=np.int64)
+        labels[inside] = self.raster[ix[inside], iy[inside]]
+        return labels
+
+    def locate(self, lat, lon) -> np.ndarray:
+        """
+        Neighbourhood id of every (lat, lon) point, or -1 for points outside all neighbourhoods.
+        """
+        x, y = self.project(lat, lon)
+        labels = self._cell_labels(x, y)
+        zone = np.where(labels >= 0, labels, -1)
+        exact = np.flatnonzero(labels == BOUNDARY)
+        if len(exact):
+            point, polygon = self.tree.query(shapely.points(x[exact], y[exact]), predicate="intersects")
+            # A point on a shared edge goes to the first polygon found
+            point, first = np.unique(point, return_index=True)
+            zone[exact[point]] = self.polygon_zone[polygon[first]]
+        return zone
+
+    def nearest(self, lat, lon) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (neighbourhood id, distance in km) of the neighbourhood closest to every point; the
+        distance is 0 for points inside a neighbourhood.
+        """
+        zone = self.locate(lat, lon)
+        distance = np.zeros(len(zone))
+        outside = np.flatnonzero(zone < 0)
+        if not len(outside):
+            return zone, distance
+        x, y = self.project(lat, lon)
+        x, y = x[outside], y[outside]
+        ix, iy, in_raster = self._cells(x, y)
+        # Within the raster only the cell's candidate polygons are measured
+        rows = np.flatnonzero(in_raster)
+        if len(rows):
+            candidates = np.asarray(self.candidates[ix[rows], iy[rows]])
+            points = shapely.points(x[rows], y[rows])
+            dist = np.full(candidates.shape, np.inf)
+            for k in range(candidates.shape[1]):
+                valid = candidates[:, k] >= 0
+                dist[valid, k] = shapely.distance(points[valid], self.polygons[candidates[valid, k]])
+            best = dist.argmin(axis=1)
+            zone[outside[rows]] = self.polygon_zone[candidates[np.arange(len(rows)), best]]
+            distance[outside[rows]] = dist[np.arange(len(rows)), best]
+        rows = np.flatnonzero(~in_raster)
+        if len(rows):
+            (point, polygon), dist = self.tree.query_nearest(shapely.points(x[rows], y[rows]),
+                                                             return_distance=True, all_matches=False)
+            zone[outside[rows[point]]] = self.polygon_zone[polygon]
+            distance[outside[rows[point]]] = dist
+        return zone, distance
+
+    def names(self, zone_ids) -> List[str]:
+        """
+        Neighbourhood names for zone ids (None for -1).
+        """
+        return [self.zones[z] if z >= 0 else None for z in np.asarray(zone_ids).tolist()]
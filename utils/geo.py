@@ -0,0 +1,44 @@
+import json
+import numpy as np
+from typing import Dict, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance in km between (lat1, lon1) and (lat2, lon2); works on scalars and NumPy arrays.
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def project_km(lat, lon, ref_lat: float, ref_lon: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Equirectangular projection to x/y in km around a reference point; accurate to well under
+    a percent over a city, so Euclidean distances in the plane match haversine distances.
+    """
+    lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+    x = np.radians(lon - ref_lon) * EARTH_RADIUS_KM * np.cos(np.radians(ref_lat))
+    y = np.radians(lat - ref_lat) * EARTH_RADIUS_KM
+    return x, y
+
+
+def load_place_coordinates(destination_json_path: str = "data/destination_coordinates.json",
+                           geojson_path: str = "data/buurten.geojson") -> Dict[str, Tuple[float, float]]:
+    """
+    (latitude, longitude) per place name: neighbourhood centroids (geo_point_2d) from the
+    buurten GeoJSON, plus the POI coordinates, which take precedence.
+    """
+    coords = {}
+    with open(geojson_path, "r", encoding="utf-8") as f:
+        for feature in json.load(f)["features"]:
+            props = feature["properties"]
+            point = props.get("geo_point_2d")
+            if point:
+                coords[props["buurtnaam"]] = (point["lat"], point["lon"])
+    with open(destination_json_path, "r", encoding="utf-8") as f:
+        for name, point in json.load(f).items():
+            coords[name] = (point["latitude"], point["longitude"])
+    return coords
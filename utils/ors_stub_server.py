@@ -0,0 +1,67 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from utils.geo import haversine_km
+
+# Road distance and speed used for the stub's answers
+DETOUR_FACTOR = 1.3
+SPEED_KMH = 30
+
+
+def _route(a, b):
+    """
+    (meters, seconds) between two [lon, lat] points.
+    """
+    km = float(haversine_km(a[1], a[0], b[1], b[0])) * DETOUR_FACTOR
+    return km * 1000, km / SPEED_KMH * 3600
+
+
+class ORSStubHandler(BaseHTTPRequestHandler):
+    """
+    Answers OpenRouteService directions (GeoJSON) and matrix requests with straight-line
+    distances times DETOUR_FACTOR at SPEED_KMH, over keep-alive connections.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        self.server.requests.append(self.path)
+        if "/matrix/" in self.path:
+            locations = body["locations"]
+            sources = body.get("sources", range(len(locations)))
+            destinations = body.get("destinations", range(len(locations)))
+            routes = [[_route(locations[i], locations[j]) for j in destinations] for i in sources]
+            response = {"distances": [[r[0] for r in row] for row in routes],
+                        "durations": [[r[1] for r in row] for row in routes]}
+        elif "/directions/" in self.path:
+            distance, duration = _route(*body["coordinates"][:2])
+            response = {"features": [{"properties": {"segments": [{"distance": distance, "duration": duration}]}}]}
+        else:
+            self.send_error(404)
+            return
+        data = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(port: int = 0) -> ThreadingHTTPServer:
+    """
+    Serve the stub in a background thread; its URL is f"http://127.0.0.1:{server.server_port}" and
+    server.requests lists the paths of the requests received.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), ORSStubHandler)
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    server = start_stub_server(8080)
+    print(f"ORS stub listening on http://127.0.0.1:{server.server_port} (set ORS_URL to use it)")
+    threading.Event().wait()
@@ -1,65 +1,45 @@
-import matplotlib.pyplot as plt
-from typing import List, Dict
-from collections import Counter
+from typing import List, Dict, Union
 import numpy as np
+from simulation.results import TripResults
+from simulation.aggregators import TripSummary
 
-def summarize_for_plot(results: List[Dict]) -> Dict:
+
+def show_or_save(fig, filename: str = None):
+    """
+    Show a figure in a window, or write it to filename (and close it) for headless runs.
+    """
+    import matplotlib.pyplot as plt
+    if filename:
+        fig.savefig(filename)
+        plt.close(fig)
+        print(f"Figure written to {filename}")
+    else:
+        plt.show()
+
+def summarize_for_plot(results: Union[List[Dict], TripResults, TripSummary]) -> Dict:
     """
     Summarizes emissions, time, weather, and delays per vehicle type.
+    Accepts a list of trip summaries, a columnar TripResults or an accumulated TripSummary.
     (Occupancy is not included in the summary.)
     """
-    summary = {}
-    weather_counter = Counter()
-    duration_list = []
-    delay_threshold = 0.1  # hours (6 min)
-    delayed_trips = 0
-    total_delay = 0
-    for trip in results:
-        v = trip["vehicle"]
-        if v not in summary:
-            summary[v] = {
-                "total_emissions": 0,
-                "total_time": 0,
-                "total_emissions_per_passenger": 0,
-                "count": 0
-            }
-        summary[v]["total_emissions"] += trip["emissions_total_g"]
-        summary[v]["total_time"] += trip["duration_hr"]
-        summary[v]["total_emissions_per_passenger"] += trip["emissions_per_passenger_g"]
-        summary[v]["count"] += 1
-        weather_counter[trip["weather"]] += 1
-        duration_list.append(trip["duration_hr"])
-        # Delay: if duration is more than expected for clear weather by threshold
-        expected_time = trip["distance_km"] / trip["speed_kmh"] if trip["speed_kmh"] > 0 else float('inf')
-        delay = trip["duration_hr"] - expected_time
-        if delay > delay_threshold:
-            delayed_trips += 1
-            total_delay += delay
-
-    # Compute averages
-    for v in summary:
-        summary[v]["avg_emissions"] = summary[v]["total_emissions"] / summary[v]["count"]
-        summary[v]["avg_time"] = summary[v]["total_time"] / summary[v]["count"]
-        summary[v]["avg_emissions_per_passenger"] = summary[v]["total_emissions_per_passenger"] / summary[v]["count"]
-    summary["weather_distribution"] = dict(weather_counter)
-    summary["duration_list"] = duration_list
-    summary["delayed_trips"] = delayed_trips
-    summary["total_trips"] = len(results)
-    summary["avg_delay_min"] = (total_delay / delayed_trips * 60) if delayed_trips > 0 else 0
-    return summary
-
-
-def plot_summary(summary: Dict):
+    if not isinstance(results, TripSummary):
+        accumulator = TripSummary()
+        accumulator.update(results)
+        results = accumulator
+    return results.result()
+
+
+def plot_summary(summary: Dict, filename: str = None):
     """
     Plots average emissions, time, emissions per passenger, weather, and trip duration distribution.
-    (Occupancy is not shown.)
+    (Occupancy is not shown.) With a filename the figure is saved instead of shown.
     """
-    vehicles = [v for v in summary if v not in ["weather_distribution", "duration_list", "delayed_trips", "total_trips", "avg_delay_min"]]
+    import matplotlib.pyplot as plt
+    vehicles = [v for v in summary if isinstance(summary[v], dict) and "avg_emissions" in summary[v]]
     avg_emissions = [summary[v]["avg_emissions"] for v in vehicles]
     avg_time = [summary[v]["avg_time"] for v in vehicles]
     avg_emissions_per_passenger = [summary[v]["avg_emissions_per_passenger"] for v in vehicles]
     weather_dist = summary["weather_distribution"]
-    duration_list = summary["duration_list"]
     delayed_trips = summary["delayed_trips"]
     total_trips = summary["total_trips"]
     avg_delay_min = summary["avg_delay_min"]
@@ -92,7 +72,7 @@ def plot_summary(summary: Dict):
     axs[1, 1].set_xlabel("Weather")
 
     plt.tight_layout(rect=[0, 0.03, 1, 0.95])
-    plt.show()
+    show_or_save(fig, filename)
 
     # Print delay stats
     print(f"Delayed trips (>6min): {delayed_trips} / {total_trips} ({100*delayed_trips/total_trips:.1f}%), Avg delay: {avg_delay_min:.1f} min")
@@ -100,37 +80,33 @@ def plot_summary(summary: Dict):
     return fig
 
 
-def plot_distributions_per_vehicle(results: List[Dict]):
+def plot_distributions_per_vehicle(results: Union[List[Dict], TripResults], filename: str = None):
     """
     Plots distribution histograms for trip duration, emissions, and emissions per passenger per vehicle type.
+    Accepts a list of trip summaries or a columnar TripResults. With a filename the figure is saved instead of shown.
     """
     import matplotlib.pyplot as plt
-    import numpy as np
-    from collections import defaultdict
-
     metrics = [
         ("duration_hr", "Trip Duration (hours)", "Duration (hours)"),
         ("emissions_total_g", "Total Emissions (g CO₂)", "Emissions (g CO₂)"),
         ("emissions_per_passenger_g", "Emissions per Passenger (g CO₂)", "Emissions per Passenger (g CO₂)")
     ]
-    vehicle_types = set(trip["vehicle"] for trip in results)
-    data = {metric: defaultdict(list) for metric, _, _ in metrics}
-    for trip in results:
-        for metric, _, _ in metrics:
-            data[metric][trip["vehicle"]].append(trip[metric])
+    results = TripResults.coerce(results)
+    vehicle_names = results.categories["vehicle"]
+    vehicle_codes = sorted(results.present_codes("vehicle"), key=lambda c: vehicle_names[c])
 
     fig, axs = plt.subplots(1, len(metrics), figsize=(6 * len(metrics), 5))
     if len(metrics) == 1:
         axs = [axs]
     colors = ["#00a5cf", "#004e64", "#9fffcb", "#8187dc"]
     for idx, (metric, title, xlabel) in enumerate(metrics):
-        for i, v in enumerate(sorted(vehicle_types)):
-            axs[idx].hist(data[metric][v], bins=20, alpha=0.6, label=v, color=colors[i % len(colors)])
+        for i, code in enumerate(vehicle_codes):
+            values = results.columns[metric][results.columns["vehicle"] == code]
+            axs[idx].hist(values, bins=20, alpha=0.6, label=vehicle_names[code], color=colors[i % len(colors)])
         axs[idx].set_title(title)
         axs[idx].set_xlabel(xlabel)
         axs[idx].set_ylabel("Number of Trips")
         axs[idx].legend()
     plt.tight_layout()
-    plt.show()
+    show_or_save(fig, filename)
     return fig
-
@@ -0,0 +1,92 @@
+import os
+import numpy as np
+from typing import Dict, List, Tuple
+from utils.geo import haversine_km, load_place_coordinates
+
+DISTANCE_MATRIX_PATH = "data/distance_matrix.npz"
+MODES = ("car", "bike")
+
+
+def fit_detour_factors(od_matrix: Dict[Tuple[str, str], Dict[str, float]],
+                       coordinates: Dict[str, Tuple[float, float]]) -> Dict[str, float]:
+    """
+    Road distance / straight-line distance per mode, fitted by least squares (through the origin)
+    to the pairs of the OD matrix that have coordinates.
+    """
+    factors = {}
+    for mode in MODES:
+        pairs = [(o, d, modes[mode]) for (o, d), modes in od_matrix.items()
+                 if modes.get(mode) is not None and o in coordinates and d in coordinates]
+        if not pairs:
+            raise ValueError(f"No {mode} distances with coordinates to fit a detour factor to")
+        straight = haversine_km([coordinates[o][0] for o, _, _ in pairs], [coordinates[o][1] for o, _, _ in pairs],
+                                [coordinates[d][0] for _, d, _ in pairs], [coordinates[d][1] for _, d, _ in pairs])
+        road = np.array([km for _, _, km in pairs])
+        factors[mode] = float((straight * road).sum() / (straight * straight).sum())
+    return factors
+
+
+def build_distance_matrix(coordinates: Dict[str, Tuple[float, float]], factors: Dict[str, float]) -> Dict:
+    """
+    Dense distance matrices (km) per mode between all places: haversine times the detour factor.
+    """
+    places = sorted(coordinates)
+    lat = np.array([coordinates[p][0] for p in places])
+    lon = np.array([coordinates[p][1] for p in places])
+    straight = haversine_km(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
+    matrix = {"places": np.array(places), "lat": lat, "lon": lon}
+    for mode in MODES:
+        matrix[f"{mode}_km"] = straight * factors[mode]
+        matrix[f"{mode}_detour"] = np.float64(factors[mode])
+    return matrix
+
+
+def save_distance_matrix(matrix: Dict, path: str = DISTANCE_MATRIX_PATH):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez(path, **matrix)
+
+
+class DistanceMatrix:
+    """
+    Precomputed distances between all places, looked up by name.
+    """
+
+    def __init__(self, places: List[str], car_km: np.ndarray, bike_km: np.ndarray, factors: Dict[str, float] = None):
+        self.places = list(places)
+        self.index = {p: i for i, p in enumerate(self.places)}
+        self.km = {"car": car_km, "bike": bike_km}
+        self.factors = factors or {}
+
+    @classmethod
+    def load(cls, path: str = DISTANCE_MATRIX_PATH) -> "DistanceMatrix":
+        with np.load(path) as data:
+            return cls(data["places"].tolist(), data["car_km"], data["bike_km"],
+                       {mode: float(data[f"{mode}_detour"]) for mode in MODES})
+
+    def distance(self, origin: str, destination: str, mode: str = "car") -> float:
+        i = self.index.get(origin)
+        j = self.index.get(destination)
+        if i is None or j is None:
+            return None
+        return float(self.km["bike" if mode == "bike" else "car"][i, j])
+
+
+def precompute(path: str = DISTANCE_MATRIX_PATH) -> Dict:
+    """
+    Fit detour factors to the City's OD CSV distances and save the full matrix for all
+    neighbourhood centroids and POIs.
+    """
+    from simulation.city import City
+    coordinates = load_place_coordinates()
+    factors = fit_detour_factors(City(use_real_data=False).od_matrix, coordinates)
+    matrix = build_distance_matrix(coordinates, factors)
+    save_distance_matrix(matrix, path)
+    return matrix
+
+
+if __name__ == "__main__":
+    matrix = precompute()
+    n = len(matrix["places"])
+    print(f"Saved {n}x{n} distance matrix to {DISTANCE_MATRIX_PATH} "
+          f"(detour factors: car {float(matrix['car_detour']):.3f}, bike {float(matrix['bike_detour']):.3f})")
@@ -1,9 +1,33 @@
-# import requests
 import os
+import json
+import time
+import queue
+import sqlite3
+import asyncio
+import threading
+import http.client
+from urllib.parse import urlsplit
+from typing import Dict, Iterable, List, Optional, Tuple
 
 # You need to get a free API key from https://openrouteservice.org/
-ORS_API_KEY = os.environ.get("ORS_API_KEY", "YOUR_ORS_API_KEY_HERE")
-ORS_BASE_URL = "https://api.openrouteservice.org/v2/directions/driving-car/geojson"
+ORS_API_KEY_PLACEHOLDER = "YOUR_ORS_API_KEY_HERE"
+ORS_API_KEY = os.environ.get("ORS_API_KEY", ORS_API_KEY_PLACEHOLDER)
+# Point ORS_URL at a local stub server (utils/ors_stub_server.py) to run without the real service
+ORS_URL = os.environ.get("ORS_URL", "https://api.openrouteservice.org")
+ORS_DIRECTIONS_PATH = "/v2/directions/driving-car/geojson"
+ORS_MATRIX_PATH = "/v2/matrix/driving-car"
+# The free ORS plan allows 40 directions requests per minute and 3500 elements per matrix request
+ORS_REQUESTS_PER_SECOND = float(os.environ.get("ORS_REQUESTS_PER_SECOND", 40 / 60))
+ORS_MATRIX_MAX_ELEMENTS = 3500
+ORS_TIMEOUT_S = 10
+ORS_MAX_CONNECTIONS = 4
+
+# Route cache: distances and durations are kept on disk for a week
+CACHE_PATH = os.environ.get("ORS_CACHE_PATH", "data/ors_cache.sqlite")
+CACHE_TTL_S = 7 * 24 * 3600
+
+# Assumed free-flow speed for the traffic level (km/h)
+FREE_FLOW_KMH = 50
 
 # Example coordinates for zones (Eindhoven, adjust as needed)
 ZONE_COORDS = {
@@ -15,47 +39,302 @@ ZONE_COORDS = {
     "Gestel": [5.4570, 51.4230],
 }
 
+# A route is (distance in meters, duration in seconds)
+Route = Tuple[float, float]
+
+
+class RouteCache:
+    """
+    Persistent cache of routes per (origin, destination) in SQLite; entries expire after ttl seconds.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, ttl: float = CACHE_TTL_S):
+        self.path = path
+        self.ttl = ttl
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS routes (origin TEXT, destination TEXT, distance_m REAL, "
+                        "duration_s REAL, fetched_at REAL, PRIMARY KEY (origin, destination))")
+        self.db.commit()
+
+    def get(self, origin: str, destination: str) -> Optional[Route]:
+        with self.lock:
+            row = self.db.execute("SELECT distance_m, duration_s FROM routes WHERE origin = ? AND destination = ? "
+                                  "AND fetched_at >= ?", (origin, destination, time.time() - self.ttl)).fetchone()
+        return row
+
+    def put_many(self, routes: Dict[Tuple[str, str], Route]):
+        now = time.time()
+        with self.lock:
+            self.db.executemany("INSERT OR REPLACE INTO routes VALUES (?, ?, ?, ?, ?)",
+                                [(o, d, dist, dur, now) for (o, d), (dist, dur) in routes.items()])
+            self.db.commit()
+
+    def put(self, origin: str, destination: str, route: Route):
+        self.put_many({(origin, destination): route})
+
+    def clear(self):
+        with self.lock:
+            self.db.execute("DELETE FROM routes")
+            self.db.commit()
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+class TokenBucket:
+    """
+    Rate limiter: up to burst requests at once, refilled at rate requests per second.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ConnectionPool:
+    """
+    Keep-alive HTTP(S) connections to one host, handed out to one request at a time.
+    """
+
+    def __init__(self, base_url: str, size: int = ORS_MAX_CONNECTIONS, timeout: float = ORS_TIMEOUT_S):
+        url = urlsplit(base_url)
+        self.https = url.scheme == "https"
+        self.host = url.hostname
+        self.port = url.port
+        self.timeout = timeout
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+
+    def _connect(self) -> http.client.HTTPConnection:
+        cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def post(self, path: str, body: Dict, headers: Dict[str, str]) -> Dict:
+        """
+        POST a JSON body and return the decoded JSON response (blocking). A connection the server
+        closed while idle is reopened once.
+        """
+        data = json.dumps(body).encode()
+        headers = {**headers, "Content-Type": "application/json", "Connection": "keep-alive"}
+        with self.slots:
+            try:
+                conn = self.idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            for attempt in range(2):
+                try:
+                    conn.request("POST", path, body=data, headers=headers)
+                    resp = conn.getresponse()
+                    payload = resp.read()
+                    break
+                except (http.client.RemoteDisconnected, ConnectionError, http.client.CannotSendRequest):
+                    conn.close()
+                    if attempt:
+                        raise
+                    conn = self._connect()
+            if resp.will_close:
+                conn.close()
+            else:
+                self.idle.put(conn)
+        if resp.status >= 400:
+            raise RuntimeError(f"HTTP {resp.status}: {payload[:200].decode(errors='replace')}")
+        return json.loads(payload)
+
+    def close(self):
+        while not self.idle.empty():
+            self.idle.get_nowait().close()
+
+
+class ORSClient:
+    """
+    Asynchronous OpenRouteService client for routes between the zones in ZONE_COORDS.
+    Requests go through a pool of keep-alive connections (blocking I/O in worker threads) behind a
+    token-bucket rate limiter. Routes are cached on disk, and concurrent lookups of the same
+    origin-destination pair share a single request. route_matrix() fetches many pairs at once
+    through the matrix endpoint.
+    """
+
+    def __init__(self, api_key: str = ORS_API_KEY, base_url: str = ORS_URL, cache: RouteCache = None,
+                 max_connections: int = ORS_MAX_CONNECTIONS, rate: float = ORS_REQUESTS_PER_SECOND,
+                 coords: Dict[str, List[float]] = None):
+        self.headers = {"Authorization": api_key}
+        self.pool = ConnectionPool(base_url, max_connections)
+        self.cache = cache if cache is not None else RouteCache()
+        self.limiter = TokenBucket(rate, burst=max_connections)
+        self.coords = coords if coords is not None else ZONE_COORDS
+        self.inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.requests = 0
+
+    async def _post(self, path: str, body: Dict) -> Dict:
+        await self.limiter.acquire()
+        self.requests += 1
+        return await asyncio.to_thread(self.pool.post, path, body, self.headers)
+
+    async def _fetch_route(self, origin: str, destination: str) -> Route:
+        data = await self._post(ORS_DIRECTIONS_PATH, {"coordinates": [self.coords[origin], self.coords[destination]]})
+        segment = data["features"][0]["properties"]["segments"][0]
+        route = (float(segment["distance"]), float(segment["duration"]))
+        self.cache.put(origin, destination, route)
+        return route
+
+    async def route(self, origin: str, destination: str) -> Optional[Route]:
+        """
+        (distance in meters, duration in seconds) between two zones, or None for unknown zones.
+        """
+        if origin not in self.coords or destination not in self.coords:
+            return None
+        key = (origin, destination)
+        cached = self.cache.get(*key)
+        if cached is not None:
+            return cached
+        future = self.inflight.get(key)
+        if future is None:
+            future = self.inflight[key] = asyncio.ensure_future(self._fetch_route(*key))
+            future.add_done_callback(lambda _: self.inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def distance(self, origin: str, destination: str) -> Optional[float]:
+        """
+        Driving distance in km.
+        """
+        route = await self.route(origin, destination)
+        return route[0] / 1000.0 if route is not None else None
+
+    async def traffic(self, origin: str, destination: str) -> Optional[int]:
+        """
+        Traffic level (0-100) from the travel duration vs. the free-flow duration.
+        """
+        route = await self.route(origin, destination)
+        return traffic_level(*route) if route is not None else None
+
+    async def route_matrix(self, pairs: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Route]:
+        """
+        Routes for many (origin, destination) pairs. Pairs that are not cached are fetched through
+        the matrix endpoint, in requests of at most ORS_MATRIX_MAX_ELEMENTS origin-destination cells.
+        """
+        pairs = [p for p in dict.fromkeys(pairs) if p[0] in self.coords and p[1] in self.coords]
+        routes = {}
+        missing = []
+        for pair in pairs:
+            cached = self.cache.get(*pair)
+            if cached is not None:
+                routes[pair] = cached
+            else:
+                missing.append(pair)
+        if missing:
+            origins = list(dict.fromkeys(o for o, _ in missing))
+            destinations = list(dict.fromkeys(d for _, d in missing))
+            step = max(1, ORS_MATRIX_MAX_ELEMENTS // len(destinations))
+            chunks = [origins[i:i + step] for i in range(0, len(origins), step)]
+            results = await asyncio.gather(*(self._fetch_matrix(chunk, destinations) for chunk in chunks))
+            fetched = {}
+            for result in results:
+                fetched.update(result)
+            self.cache.put_many(fetched)
+            routes.update((pair, fetched[pair]) for pair in missing if pair in fetched)
+        return routes
+
+    async def _fetch_matrix(self, origins: List[str], destinations: List[str]) -> Dict[Tuple[str, str], Route]:
+        body = {
+            "locations": [self.coords[z] for z in origins + destinations],
+            "sources": list(range(len(origins))),
+            "destinations": list(range(len(origins), len(origins) + len(destinations))),
+            "metrics": ["distance", "duration"],
+        }
+        data = await self._post(ORS_MATRIX_PATH, body)
+        routes = {}
+        for i, o in enumerate(origins):
+            for j, d in enumerate(destinations):
+                dist, dur = data["distances"][i][j], data["durations"][i][j]
+                if dist is not None and dur is not None:
+                    routes[(o, d)] = (float(dist), float(dur))
+        return routes
+
+    def close(self):
+        self.pool.close()
+
+
+def traffic_level(distance_m: float, duration_s: float) -> int:
+    """
+    Traffic level (0-100): the percentage by which the travel duration exceeds free flow.
+    """
+    free_flow = (distance_m / 1000) / FREE_FLOW_KMH * 3600
+    if free_flow <= 0:
+        return 0
+    return min(100, max(0, int(100 * (duration_s / free_flow - 1))))
+
+
+# Shared client for the synchronous helpers, driven by an event loop in a background thread
+_client: ORSClient = None
+_loop: asyncio.AbstractEventLoop = None
+_lock = threading.Lock()
+
+
+def _run(coro_fn, *args):
+    global _client, _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="ors-client", daemon=True).start()
+        if _client is None:
+            _client = ORSClient()
+    return asyncio.run_coroutine_threadsafe(coro_fn(_client, *args), _loop).result()
+
+
+def has_api_key() -> bool:
+    return ORS_API_KEY != ORS_API_KEY_PLACEHOLDER
+
+
 def get_real_distance(origin: str, destination: str) -> float:
     """
     Returns the real-world driving distance (in km) between two zones using OpenRouteService.
     """
-    if origin not in ZONE_COORDS or destination not in ZONE_COORDS:
-        return None
-    coords = [ZONE_COORDS[origin], ZONE_COORDS[destination]]
-    headers = {"Authorization": ORS_API_KEY, "Content-Type": "application/json"}
-    body = {"coordinates": coords}
     try:
-        resp = requests.post(ORS_BASE_URL, json=body, headers=headers, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-        # Distance in meters (GeoJSON response)
-        meters = data["features"][0]["properties"]["segments"][0]["distance"]
-        return meters / 1000.0
+        return _run(ORSClient.distance, origin, destination)
     except Exception as e:
         print(f"[ORS] Error fetching distance: {e}")
         return None
 
+
 def get_real_traffic(origin: str, destination: str) -> int:
     """
     Returns a traffic level (0-100) based on travel duration vs. free-flow duration.
     """
-    if origin not in ZONE_COORDS or destination not in ZONE_COORDS:
-        return 50
-    coords = [ZONE_COORDS[origin], ZONE_COORDS[destination]]
-    headers = {"Authorization": ORS_API_KEY, "Content-Type": "application/json"}
-    body = {"coordinates": coords}
     try:
-        resp = requests.post(ORS_BASE_URL, json=body, headers=headers, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-        segment = data["features"][0]["properties"]["segments"][0]
-        duration = segment["duration"]  # seconds
-        distance = segment["distance"]  # meters
-        # Assume free-flow speed = 50 km/h
-        free_flow = (distance / 1000) / 50 * 3600
-        traffic_level = min(100, max(0, int(100 * (duration / free_flow - 1))))
-        return traffic_level
+        level = _run(ORSClient.traffic, origin, destination)
+        return level if level is not None else 50
     except Exception as e:
         print(f"[ORS] Error fetching traffic: {e}")
         return 50
 
+
+def prefetch_routes(pairs: Iterable[Tuple[str, str]] = None) -> int:
+    """
+    Fill the route cache for the given pairs (all zone pairs by default) with matrix requests.
+    Returns the number of routes available.
+    """
+    if pairs is None:
+        pairs = [(o, d) for o in ZONE_COORDS for d in ZONE_COORDS if o != d]
+    try:
+        return len(_run(ORSClient.route_matrix, list(pairs)))
+    except Exception as e:
+        print(f"[ORS] Error fetching route matrix: {e}")
+        return 0